@@ -55,15 +55,27 @@ setup (
     package_dir = {'':'src'},
     namespace_packages = ['z3c', 'z3c.language'],
     extras_require = dict(
+        catalog = [
+            'zope.catalog',
+            'zope.container',
+            'zope.index',
+            'zope.intid',
+            ],
         test = [
             'z3c.coverage',
             'z3c.testing',
+            'zope.catalog',
+            'zope.container',
+            'zope.index',
+            'zope.intid',
             'zope.testing',
             'zope.app.testing',
             ],
         ),
     install_requires = [
         'setuptools',
+        'ZODB3',
+        'transaction',
         'zope.app.generations',
         'zope.component',
         'zope.event',
@@ -73,6 +85,12 @@ setup (
         'zope.publisher',
         'zope.schema',
         'zope.security',
+        'zope.traversing',
         ],
+    entry_points = {
+        'console_scripts': [
+            'language-switch-benchmark = z3c.language.switch.benchmark:main',
+            ],
+        },
     zip_safe = False,
     )
@@ -21,6 +21,13 @@ import zope.interface
 
 from z3c.language.switch import II18n
 from z3c.language.switch import II18nLanguageSwitch
+from z3c.language.switch.context import queryLanguage
+from z3c.language.switch.event import I18nModifiedEvent
+from z3c.language.switch.event import I18nLanguageAddedEvent
+from z3c.language.switch.event import I18nLanguageRemovedEvent
+from z3c.language.switch.event import notifyModified
+
+_marker = object()
 
 
 class I18nLanguageSwitch(object):
@@ -35,7 +42,11 @@ class I18nLanguageSwitch(object):
     def __init__(self, context):
         self.context = context
         self.i18n = self._getI18n()
-        self._language = self._getDefaultLanguage()
+        language = queryLanguage()
+        if (language is None or
+            language not in self.i18n.getAvailableLanguages()):
+            language = self._getDefaultLanguage()
+        self._language = language
 
     def _getDefaultLanguage(self):
         """Subclasses may overwrite this method."""
@@ -58,14 +69,34 @@ class I18nLanguageSwitch(object):
 class I18nAdapter(object):
     """Mixing class for i18n adapters which must provide the adapted object 
        under the attribute 'self.i18n'.
+
+       If the adapter provides a 'self.context' which is not the i18n object
+       itself, the write methods notify I18nModifiedEvents for the context.
     """
     zope.interface.implements(II18n)
 
+    # private helper method
+    def _notifyModified(self, language, names=(), factory=I18nModifiedEvent):
+        context = getattr(self, 'context', None)
+        if context is not None and context is not self.i18n:
+            notifyModified(context, language, names, factory)
+
+    # private method used by the value cache
+    def _getCacheKey(self):
+        getCacheKey = getattr(self.i18n, '_getCacheKey', None)
+        if getCacheKey is None:
+            return None
+        return getCacheKey()
+
     # z3c.langauge.switch.IReadI18n
     def getAvailableLanguages(self):
         """See `z3c.langauge.switch.interfaces.IReadI18n`"""
         return self.i18n.getAvailableLanguages()
 
+    def getLanguagesFingerprint(self):
+        """See `z3c.langauge.switch.interfaces.IReadI18n`"""
+        return self.i18n.getLanguagesFingerprint()
+
     def getDefaultLanguage(self):
         """See `z3c.langauge.switch.interfaces.IReadI18n`"""
         return self.i18n.getDefaultLanguage()
@@ -76,7 +107,12 @@ class I18nAdapter(object):
 
     def getAttribute(self, name, language=None):
         return self.i18n.getAttribute(name, language)
-        
+
+    def getAttributes(self, names, language=None, default=_marker):
+        if default is _marker:
+            return self.i18n.getAttributes(names, language)
+        return self.i18n.getAttributes(names, language, default)
+
     def queryAttribute(self, name, language=None, default=None):
         return self.i18n.queryAttribute(name, language, default)
 
@@ -87,12 +123,18 @@ class I18nAdapter(object):
 
     def addLanguage(self, language, *args, **kw):
         """See `z3c.langauge.switch.interfaces.IWriteI18n`"""
-        return self.i18n.addLanguage(language, *args, **kw)
+        result = self.i18n.addLanguage(language, *args, **kw)
+        if language is None:
+            language = self.i18n.getDefaultLanguage()
+        self._notifyModified(language, factory=I18nLanguageAddedEvent)
+        return result
 
     def removeLanguage(self, language):
         """See `z3c.langauge.switch.interfaces.IWriteI18n`"""
         self.i18n.removeLanguage(language)
+        self._notifyModified(language, factory=I18nLanguageRemovedEvent)
 
     def setAttributes(self, language, **kws):
         """See `z3c.langauge.switch.interfaces.IWriteI18n`"""
         self.i18n.setAttributes(language, **kws)
+        self._notifyModified(language, kws.keys())
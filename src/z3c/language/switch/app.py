@@ -17,29 +17,101 @@ $Id$
 """
 __docformat__ = 'restructuredtext'
 
+import copy
+import sys
+from types import ClassType
+
 import persistent
 import zope.interface
-import zope.component
 import zope.event
 import zope.lifecycleevent
-from zope.i18n.interfaces import INegotiator
-from zope.security.interfaces import NoInteraction
-from zope.security.management import getInteraction
+import zope.schema
+from zope.security.management import queryInteraction
+from BTrees.OOBTree import OOBTree
 
 from z3c.language.switch import II18n
+from z3c.language.switch.context import queryLanguage
+from z3c.language.switch.context import queryRequest
+from z3c.language.switch.event import I18nLanguageAddedEvent
+from z3c.language.switch.event import I18nLanguageRemovedEvent
+from z3c.language.switch.event import eventsSuppressed
+from z3c.language.switch.event import notifyModified
+from z3c.language.switch.negotiator import queryNegotiator
+
+
+_NEGOTIATED_LANGUAGES_KEY = 'z3c.language.switch.negotiated'
+
+_marker = object()
 
 
 def getRequest():
-    try:
-        interaction = getInteraction()
-        request = interaction.participations[0]
-    except NoInteraction:
-        request = None
-    except IndexError:
-        request = None
+    """Return the current request or None.
+
+    The request set by the publication events for the current thread gets
+    used, the first participation of the interaction otherwise.
+    """
+    request = queryRequest()
+    if request is None:
+        interaction = queryInteraction()
+        if interaction is not None and interaction.participations:
+            request = interaction.participations[0]
     return request
 
 
+def getNegotiatedLanguages(request):
+    """Return the negotiated language cache stored on the request.
+
+    The cache maps the negotiator to a mapping of the tuples of available
+    languages to the language the negotiator returned for them. None is
+    returned if the request does not support annotations.
+    """
+    annotations = getattr(request, 'annotations', None)
+    if annotations is None:
+        return None
+    cache = annotations.get(_NEGOTIATED_LANGUAGES_KEY)
+    if cache is None:
+        cache = annotations[_NEGOTIATED_LANGUAGES_KEY] = {}
+    return cache
+
+
+def negotiateLanguage(languages, request, context=None):
+    """Return the negotiated language for the given tuple of languages.
+
+    The negotiator of the site of the context gets asked only once per
+    request and languages. Objects of sites with different negotiators
+    don't share the negotiated languages.
+    """
+    negotiator = queryNegotiator(context)
+    if negotiator is None:
+        return None
+
+    cache = getNegotiatedLanguages(request)
+    if cache is not None:
+        cache = cache.setdefault(negotiator, {})
+        if languages in cache:
+            return cache[languages]
+
+    language = negotiator.getLanguage(languages, request)
+    if cache is not None:
+        cache[languages] = language
+    return language
+
+
+def _getParentLanguage(language):
+    """Return the language without the last region part or None."""
+    for separator in ('-', '_'):
+        if separator in language:
+            return language.rsplit(separator, 1)[0]
+    return None
+
+
+def clearNegotiatedLanguages(event):
+    """Drop the negotiated language cache at the end of a request."""
+    annotations = getattr(event.request, 'annotations', None)
+    if annotations is not None:
+        annotations.pop(_NEGOTIATED_LANGUAGES_KEY, None)
+
+
 class I18n(persistent.Persistent, object):
     """Mixin implementation of II18n.
 
@@ -101,6 +173,28 @@ class I18n(persistent.Persistent, object):
     >>> i18n.queryAttribute('firstname', 'zh') is None
     True
 
+    Several attributes of a translation can be read at once:
+
+    >>> sorted(i18n.getAttributes(('firstname', 'lastname'), 'en').items())
+    [('firstname', 'Bob'), ('lastname', 'Miller')]
+
+    >>> i18n.getAttributes(('firstname', 'name'))
+    Traceback (most recent call last):
+    ...
+    AttributeError: 'Person' object has no attribute 'name'
+
+    >>> i18n.getAttributes(('firstname',), 'zh')
+    Traceback (most recent call last):
+    ...
+    KeyError: 'zh'
+
+    Missing attributes and languages are returned as default if given:
+
+    >>> sorted(i18n.getAttributes(('firstname', 'name'), default=None).items())
+    [('firstname', 'Bob'), ('name', None)]
+    >>> i18n.getAttributes(('firstname',), 'zh', default=None)
+    {'firstname': None}
+
     You can set the attributes an other time:
 
     >>> i18n.setAttributes('en', firstname='Foo', lastname='Bar')
@@ -118,9 +212,66 @@ class I18n(persistent.Persistent, object):
     >>> i18n.getPreferedLanguage()
     'fr'
 
+    Subclasses can enable fallback chains for missing translations. The
+    chain of a language contains the explicitly configured fallbacks, the
+    language without region and the default language:
+
+    >>> class FallbackPerson(I18nPerson):
+    ...     _fallbackLanguages = {'de-ch': ('de-at',)}
+
+    >>> i18n = FallbackPerson(firstname='Bob', lastname='Miller')
+    >>> i18n.addLanguage('de', firstname='Robert', lastname='Mueller')
+    >>> i18n.addLanguage('de-at', firstname='Robert', lastname='Mueller')
+
+    >>> i18n.getFallbackLanguages('de-at')
+    ('de-at', 'de', 'en')
+    >>> i18n.getFallbackLanguages('de-ch')
+    ('de-at', 'de', 'en')
+    >>> i18n.getFallbackLanguages('zh')
+    ('en',)
+
+    Missing languages and attributes get read from the next language of the
+    chain:
+
+    >>> del i18n._data['de-at'].lastname
+    >>> i18n.getAttribute('firstname', 'de-ch')
+    'Robert'
+    >>> i18n.getAttribute('lastname', 'de-at')
+    'Mueller'
+    >>> i18n.getAttribute('lastname', 'zh')
+    'Miller'
+    >>> i18n.queryAttribute('name', 'de-at') is None
+    True
+
+    The chains get rebuilt if the languages or the default language change:
+
+    >>> i18n.setDefaultLanguage('de')
+    >>> i18n.getFallbackLanguages('zh')
+    ('de',)
+    >>> i18n.removeLanguage('de-at')
+    >>> i18n.getFallbackLanguages('de-ch')
+    ('de',)
+
     """
 
     _data = None
+    # factory for the translation mapping, see BTreeI18n
+    _dataFactory = dict
+    # sorted tuple of the available languages. It gets stored for answer
+    # getAvailableLanguages without loading the translations
+    _languages = None
+    # sorted languages of objects stored without _languages
+    _v_availableLanguages = None
+    # incremented whenever the set of languages changes
+    _languagesVersion = 0
+    # explicit fallback languages by language, e.g. {'de-ch': ('de-at',)}.
+    # Subclasses can set a dict for enable the fallback chains
+    _fallbackLanguages = None
+    # fallback chains by language, see getFallbackLanguages
+    _v_fallbackChains = None
+    # add languages without arguments as references to the default
+    # translation, which get copied on the first write
+    _copyOnWrite = False
     # sublclasses should overwrite this attributes.
     _defaultLanguage = None
     _factory = None
@@ -156,36 +307,133 @@ class I18n(persistent.Persistent, object):
     # private method
     def _setDataOnce(self):
         if self._data is None:
-            self._data = {}
+            self._data = self._dataFactory()
+
+    # private method: used by the generations for migrate existing objects
+    def _evolveData(self):
+        """Move the translations into a mapping created by _dataFactory.
+
+        Returns True if the data got migrated.
+        """
+        data = self._data
+        if data is None or type(data) is self._dataFactory:
+            return False
+        newData = self._dataFactory()
+        for language, obj in data.items():
+            newData[language] = obj
+        self._data = newData
+        self._updateAvailableLanguages()
+        return True
+
+    # private method: mark the record storing a translation as changed
+    def _changed(self, language, obj):
+        data = self._getData()
+        if not isinstance(data, persistent.Persistent):
+            # the translations are stored in our own record
+            self._p_changed = True
+        elif not isinstance(obj, persistent.Persistent):
+            # write the bucket storing the translation
+            data[language] = obj
 
     # private method: access self._data only using this method
     def _getData(self):
         return self._data
 
+    # private method: key of the stored revision of the translations for the
+    # value cache, None if the translations are not stored in our record or
+    # not committed. Translations created by a factory which is not a class
+    # may be persistent, then the values don't get cached either.
+    def _getCacheKey(self):
+        if isinstance(self._getData(), persistent.Persistent):
+            return None
+        factory = self._factory
+        if (not isinstance(factory, (type, ClassType)) or
+            issubclass(factory, persistent.Persistent)):
+            return None
+        jar = self._p_jar
+        if jar is None or self._p_changed:
+            return None
+        return (jar.db().database_name, self._p_oid, self._p_serial)
+
     # z3c.langauge.switch.IReadI18n
     def getAvailableLanguages(self):
         """See `z3c.langauge.switch.interfaces.IReadI18n`"""
-        keys = self._getData().keys()
-        keys.sort()
-        return keys
+        languages = self._languages
+        if languages is None:
+            languages = self._v_availableLanguages
+            if languages is None:
+                languages = self._v_availableLanguages = self._sortLanguages()
+        return languages
+
+    def getLanguagesFingerprint(self):
+        """See `z3c.langauge.switch.interfaces.IReadI18n`"""
+        return self._languagesVersion
+
+    # private method
+    def _sortLanguages(self):
+        languages = list(self._getData().keys())
+        languages.sort()
+        return tuple(languages)
+
+    # private method: rebuild the stored languages after add or remove
+    def _updateAvailableLanguages(self):
+        self._languages = self._sortLanguages()
+        self._languagesVersion += 1
+        self._v_availableLanguages = None
+        self._v_fallbackChains = None
+        return self._languages
+
+    def getFallbackLanguages(self, language):
+        """Return the available languages used for read the given language.
+
+        The chains get computed once per set of languages.
+        """
+        chains = self._v_fallbackChains
+        if chains is None:
+            chains = self._v_fallbackChains = {}
+        chain = chains.get(language)
+        if chain is None:
+            chain = chains[language] = self._buildFallbackChain(language)
+        return chain
+
+    # private method
+    def _buildFallbackChain(self, language):
+        data = self._getData()
+        fallbacks = self._fallbackLanguages or {}
+        chain = []
+        seen = set()
+        pending = [language]
+        while pending:
+            lang = pending.pop(0)
+            if lang in seen:
+                continue
+            seen.add(lang)
+            if lang in data:
+                chain.append(lang)
+            pending.extend(fallbacks.get(lang, ()))
+            parent = _getParentLanguage(lang)
+            if parent is not None:
+                pending.append(parent)
+        default = self.getDefaultLanguage()
+        if default in data and default not in seen:
+            chain.append(default)
+        return tuple(chain)
 
     def getDefaultLanguage(self):
         """See `z3c.langauge.switch.interfaces.IReadI18n`"""
         return self._defaultLanguage
 
     def getPreferedLanguage(self):
+        # the language set for the current thread
+        language = queryLanguage()
+        if language is not None and language in self.getAvailableLanguages():
+            return language
         # evaluate the negotiator
         language = None
         request = getRequest()
-        negotiator = None
-        try:
-            negotiator = zope.component.queryUtility(INegotiator,
-                name='', context=self)
-        except zope.component.ComponentLookupError:
-            # can happens during tests without a site and sitemanager
-            pass
-        if request and negotiator:
-            language = negotiator.getLanguage(self.getAvailableLanguages(), request)
+        if request is not None:
+            language = negotiateLanguage(self.getAvailableLanguages(),
+                                         request, self)
         if language is None:
             language = self.getDefaultLanguage()
         if language is None:
@@ -198,12 +446,52 @@ class I18n(persistent.Persistent, object):
         if language is None:
             language = self.getDefaultLanguage()
 
-        if not language in self.getAvailableLanguages():
+        if self._fallbackLanguages is not None:
+            return self._getFallbackAttribute(name, language)
+
+        data = self._getData()
+        if language not in data:
             raise KeyError(language)
 
         # essentials
-        data = self._getData()[language]
-        return getattr(data, name)
+        return getattr(self._resolve(data, language), name)
+
+    # private method
+    def _getFallbackAttribute(self, name, language):
+        chain = self.getFallbackLanguages(language)
+        if not chain:
+            raise KeyError(language)
+
+        data = self._getData()
+        for lang in chain[:-1]:
+            value = getattr(self._resolve(data, lang), name, _marker)
+            if value is not _marker:
+                return value
+        return getattr(self._resolve(data, chain[-1]), name)
+
+    def getAttributes(self, names, language=None, default=_marker):
+        # preconditions
+        if language is None:
+            language = self.getDefaultLanguage()
+
+        if self._fallbackLanguages is not None:
+            if default is _marker:
+                return dict([(name, self._getFallbackAttribute(name, language))
+                             for name in names])
+            return dict([(name, self.queryAttribute(name, language, default))
+                         for name in names])
+
+        data = self._getData()
+        if language not in data:
+            if default is _marker:
+                raise KeyError(language)
+            return dict([(name, default) for name in names])
+
+        # essentials
+        obj = self._resolve(data, language)
+        if default is _marker:
+            return dict([(name, getattr(obj, name)) for name in names])
+        return dict([(name, getattr(obj, name, default)) for name in names])
 
     def queryAttribute(self, name, language=None, default=None):
         try:
@@ -219,15 +507,22 @@ class I18n(persistent.Persistent, object):
             raise ValueError(
                 'cannot set nonexistent language (%s) as default' % language)
         self._defaultLanguage = language
+        self._v_fallbackChains = None
 
     def addLanguage(self, language, *args, **kw):
         """See `z3c.langauge.switch.interfaces.IWriteI18n`"""
         if not args and not kw:
+            if self._copyOnWrite:
+                self._addReference(language)
+                notifyModified(self, self._getLang(language),
+                               factory=I18nLanguageAddedEvent)
+                return
             if self._defaultArgs() is not None:
                 args = self._defaultArgs()
 
         self._get_or_add(language, *args, **kw)
-        zope.event.notify(zope.lifecycleevent.ObjectModifiedEvent(self))
+        notifyModified(self, self._getLang(language),
+                       factory=I18nLanguageAddedEvent)
 
     def removeLanguage(self, language):
         """See `z3c.langauge.switch.interfaces.IWriteI18n`"""
@@ -238,35 +533,45 @@ class I18n(persistent.Persistent, object):
             raise ValueError('cannot remove nonexistent language (%s)'
                 % language)
         else:
+            # copy the translation for the languages referencing it
+            for lang, obj in list(data.items()):
+                if (type(obj) is TranslationReference and
+                    obj.language == language):
+                    self._materialize(data, lang)
             del data[language]
-            self._p_changed = True
-        zope.event.notify(zope.lifecycleevent.ObjectModifiedEvent(self))
+            if not isinstance(data, persistent.Persistent):
+                self._p_changed = True
+            self._updateAvailableLanguages()
+        notifyModified(self, language, factory=I18nLanguageRemovedEvent)
 
     def setAttributes(self, language, **kws):
         # preconditions
-        if not language in self.getAvailableLanguages():
+        data = self._getData()
+        if language not in data:
             raise KeyError(language)
 
-        data = self._getData()
-        obj = data[language]
+        obj = self._resolve(data, language)
 
         for key in kws:
             if not hasattr(obj, key):
                 raise KeyError(key)
 
         # essentials
+        if type(data[language]) is TranslationReference:
+            obj = self._materialize(data, language)
         for key in kws:
             setattr(obj, key, kws[key])
         else:
-            self._p_changed = True
-        zope.event.notify(zope.lifecycleevent.ObjectModifiedEvent(self))
+            self._changed(language, obj)
+        notifyModified(self, language, kws.keys())
 
     # private helper methods
     def _create(self, *args, **kw):
         """Create a new subobject of the type document."""
         factory = self._factory
         obj = factory(*args, **kw)
-        zope.event.notify(zope.lifecycleevent.ObjectCreatedEvent(obj))
+        if not eventsSuppressed():
+            zope.event.notify(zope.lifecycleevent.ObjectCreatedEvent(obj))
         return obj
 
     def _get(self, language):
@@ -275,9 +580,12 @@ class I18n(persistent.Persistent, object):
         language.
         """
         data = self._getData()
-        obj = data.get(language, None)
-        if obj is None:
-            obj = data[self.getDefaultLanguage()]
+        if language not in data:
+            language = self.getDefaultLanguage()
+        obj = data[language]
+        if type(obj) is TranslationReference:
+            # the caller may write, never return the source translation
+            obj = self._materialize(data, language)
         return obj
 
     def _get_or_add(self, language, *args, **kw):
@@ -294,6 +602,52 @@ class I18n(persistent.Persistent, object):
             # locationCopy method in the ObjectCopier class
             obj.__parent__ = self
             obj.__name__ = language
+            if not isinstance(data, persistent.Persistent):
+                self._p_changed = 1
+            self._updateAvailableLanguages()
+        elif type(obj) is TranslationReference:
+            # the caller may write, never return the source translation
+            obj = self._materialize(data, language)
+        return obj
+
+    def _resolve(self, data, language):
+        """Helper function -- return the translation of a language, the
+        translation of the source language for copy-on-write languages.
+        """
+        obj = data[language]
+        if type(obj) is TranslationReference:
+            obj = data[obj.language]
+        return obj
+
+    def _addReference(self, language):
+        """Helper function -- add a language referencing the default
+        translation.
+        """
+        data = self._getData()
+        language = self._getLang(language)
+        if language in data:
+            return
+        source = self.getDefaultLanguage()
+        obj = data[source]
+        if type(obj) is TranslationReference:
+            source = obj.language
+        data[language] = TranslationReference(source)
+        if not isinstance(data, persistent.Persistent):
+            self._p_changed = 1
+        self._updateAvailableLanguages()
+
+    def _materialize(self, data, language):
+        """Helper function -- replace the reference of a copy-on-write
+        language by a copy of the source translation.
+        """
+        # copy mutable values too, but keep the references to us
+        memo = {id(self): self, id(data): data}
+        obj = copy.deepcopy(data[data[language].language], memo)
+        obj.__name__ = language
+        if not eventsSuppressed():
+            zope.event.notify(zope.lifecycleevent.ObjectCreatedEvent(obj))
+        data[language] = obj
+        if not isinstance(data, persistent.Persistent):
             self._p_changed = 1
         return obj
 
@@ -303,3 +657,235 @@ class I18n(persistent.Persistent, object):
             language = self.getDefaultLanguage()
 
         return language
+
+
+class TranslationReference(object):
+    """Stands in for the translation of a copy-on-write language.
+
+    Refers to the language of the translation which gets read until the
+    first write copies it.
+    """
+
+    __slots__ = ('language',)
+
+    def __init__(self, language):
+        self.language = language
+
+    def __getstate__(self):
+        return self.language
+
+    def __setstate__(self, state):
+        self.language = state
+
+
+class Translation(persistent.Persistent):
+    """Base class for persistent translations.
+
+    Translations based on this class get stored in their own record and stay
+    ghosts until their language gets read.
+    """
+
+    __parent__ = __name__ = None
+
+
+class CompactTranslation(object):
+    """Base class for translations storing their attributes in slots.
+
+    Translations without an instance dictionary need less memory. Subclasses
+    list their attributes in ``__slots__``, see compactTranslationFactory.
+    The set slots get pickled as a dictionary:
+
+    >>> import cPickle
+    >>> from z3c.language.switch.testing import CompactDocument
+    >>> doc = CompactDocument(u'Title')
+    >>> doc.__dict__
+    Traceback (most recent call last):
+    ...
+    AttributeError: 'CompactDocument' object has no attribute '__dict__'
+    >>> doc.__getstate__()
+    {'title': u'Title'}
+    >>> cPickle.loads(cPickle.dumps(doc, 1)).title
+    u'Title'
+
+    >>> import transaction
+    >>> from ZODB.MappingStorage import DB
+    >>> from z3c.language.switch.testing import CompactI18nDocument
+    >>> db = DB()
+    >>> conn = db.open()
+    >>> conn.root()['doc'] = CompactI18nDocument(title=u'Title')
+    >>> conn.root()['doc'].addLanguage('de', title=u'Titel')
+    >>> transaction.commit()
+    >>> conn.close()
+    >>> conn = db.open()
+    >>> conn.root()['doc'].getAttribute('title', 'de')
+    u'Titel'
+    >>> conn.root()['doc']._get('de').__parent__ is conn.root()['doc']
+    True
+    >>> conn.close()
+    >>> db.close()
+
+    """
+
+    __slots__ = ('__parent__', '__name__')
+
+    def __getstate__(self):
+        state = {}
+        for cls in type(self).__mro__:
+            for name in cls.__dict__.get('__slots__', ()):
+                try:
+                    state[name] = getattr(self, name)
+                except AttributeError:
+                    pass
+        return state
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+
+
+def compactTranslationFactory(schema, name=None, module=None,
+                              bases=(CompactTranslation,)):
+    """Create a compact translation class storing the fields of a schema.
+
+    The created class implements the schema. Its constructor accepts the
+    field values as positional arguments in schema order or as keyword
+    arguments, missing fields get their default. Pass the module the class
+    gets stored in, the class must be importable for get pickled:
+
+    >>> import zope.schema
+    >>> from z3c.language.switch.app import compactTranslationFactory
+    >>> class IPerson(zope.interface.Interface):
+    ...     firstname = zope.schema.TextLine(default=u'')
+    ...     lastname = zope.schema.TextLine(default=u'')
+    >>> Person = compactTranslationFactory(IPerson)
+    >>> Person.__name__
+    'CompactPerson'
+    >>> Person.__slots__
+    ('firstname', 'lastname')
+    >>> person = Person(u'Roger', lastname=u'Ineichen')
+    >>> person.firstname, person.lastname
+    (u'Roger', u'Ineichen')
+    >>> Person().lastname
+    u''
+    >>> IPerson.providedBy(person)
+    True
+    >>> Person(foo=u'bar')
+    Traceback (most recent call last):
+    ...
+    TypeError: unexpected keyword arguments: foo
+
+    Compact translations work with ``I18n`` and the field properties:
+
+    >>> from z3c.language.switch.property import I18nFieldProperty
+    >>> class I18nPerson(I18n):
+    ...     _defaultLanguage = 'en'
+    ...     _factory = Person
+    ...     firstname = I18nFieldProperty(IPerson['firstname'])
+    >>> i18n = I18nPerson(firstname=u'Roger')
+    >>> i18n.firstname
+    u'Roger'
+    >>> i18n.firstname = u'Dominik'
+    >>> i18n.getAttribute('firstname')
+    u'Dominik'
+    >>> i18n.addLanguage('de', u'Hans')
+    >>> i18n.getAttribute('firstname', 'de')
+    u'Hans'
+    >>> i18n._get('de').__name__
+    'de'
+
+    """
+    names = tuple(zope.schema.getFieldNamesInOrder(schema))
+    if name is None:
+        name = 'Compact%s' % schema.__name__.lstrip('I')
+    if module is None:
+        module = sys._getframe(1).f_globals.get('__name__')
+
+    def __init__(self, *args, **kw):
+        if len(args) > len(names):
+            raise TypeError('too many positional arguments')
+        for fieldName, value in zip(names, args):
+            kw[fieldName] = value
+        for fieldName in names:
+            default = schema[fieldName].default
+            setattr(self, fieldName, kw.pop(fieldName, default))
+        if kw:
+            raise TypeError('unexpected keyword arguments: %s'
+                            % ', '.join(sorted(kw)))
+
+    cls = type(name, bases, {'__slots__': names, '__init__': __init__,
+                             '__module__': module})
+    zope.interface.classImplements(cls, schema)
+    return cls
+
+
+class BTreeI18n(I18n):
+    """I18n implementation storing the translations in an OOBTree.
+
+    Use a persistent class as factory, then each translation is stored in
+    its own record. Changing a translation does not write the other
+    translations and loading the object does not load all translations:
+
+    >>> import persistent
+    >>> from z3c.language.switch.app import BTreeI18n
+    >>> class Person(persistent.Persistent):
+    ...     def __init__(self, firstname):
+    ...         self.firstname = firstname
+
+    >>> class I18nPerson(BTreeI18n):
+    ...     _defaultLanguage = 'en'
+    ...     _factory = Person
+
+    >>> i18n = I18nPerson(firstname='Bob')
+    >>> i18n.addLanguage('fr', firstname='Robert')
+    >>> i18n._data
+    <BTrees.OOBTree.OOBTree object at ...>
+    >>> i18n.getAvailableLanguages()
+    ('en', 'fr')
+    >>> i18n.getAttribute('firstname', 'fr')
+    'Robert'
+
+    Existing objects using a plain dict can get migrated:
+
+    >>> i18n._data = dict(i18n._data.items())
+    >>> i18n._evolveData()
+    True
+    >>> i18n._data
+    <BTrees.OOBTree.OOBTree object at ...>
+    >>> i18n._evolveData()
+    False
+
+    Use ``Translation`` as base class of the factory for lazy loading. The
+    translations are ghosts after loading the object and only the read
+    language gets activated. The available languages are stored on the
+    object itself and do not activate any translation:
+
+    >>> import transaction
+    >>> from ZODB.MappingStorage import DB
+    >>> from z3c.language.switch.testing import BTreeI18nDocument
+
+    >>> db = DB()
+    >>> conn = db.open()
+    >>> doc = conn.root()['doc'] = BTreeI18nDocument(title=u'Title')
+    >>> doc.addLanguage('de', title=u'Titel')
+    >>> doc.addLanguage('fr', title=u'Titre')
+    >>> transaction.commit()
+    >>> conn.close()
+
+    >>> conn = db.open()
+    >>> conn.cacheMinimize()
+    >>> doc = conn.root()['doc']
+    >>> doc.getAvailableLanguages()
+    ('de', 'en', 'fr')
+    >>> [doc._data[lang]._p_changed for lang in doc.getAvailableLanguages()]
+    [None, None, None]
+    >>> doc.getAttribute('title', 'de')
+    u'Titel'
+    >>> [doc._data[lang]._p_changed for lang in doc.getAvailableLanguages()]
+    [False, None, None]
+
+    >>> conn.close()
+    >>> db.close()
+
+    """
+
+    _dataFactory = OOBTree
@@ -0,0 +1,599 @@
+##############################################################################
+#
+# Copyright (c) 2005 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Benchmarks for the i18n read and write hot paths.
+
+Run ``language-switch-benchmark --help`` for the options. The results get
+written as JSON, one entry per hot path and number of languages.
+
+$Id$
+"""
+__docformat__ = 'restructuredtext'
+
+import gc
+import optparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+try:
+    import json
+except ImportError:
+    import simplejson as json
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+import transaction
+import zope.component
+import zope.component.testing
+import zope.interface
+import zope.schema
+from zope.i18n.interfaces import INegotiator
+from zope.publisher.browser import TestRequest
+from zope.security.management import endInteraction
+from zope.security.management import newInteraction
+from BTrees.OOBTree import OOBTree
+from ZODB.DB import DB
+from ZODB.FileStorage import FileStorage
+
+try:
+    from zope.interface.interfaces import IComponentLookup
+except ImportError:
+    from zope.component.interfaces import IComponentLookup
+
+from z3c.language.switch import bulk
+from z3c.language.switch import negotiator
+from z3c.language.switch.adapters import I18nLanguageSwitch
+from z3c.language.switch.app import BTreeI18n
+from z3c.language.switch.app import I18n
+from z3c.language.switch.app import Translation
+from z3c.language.switch.app import compactTranslationFactory
+from z3c.language.switch.property import I18nFieldProperty
+from z3c.language.switch.property import I18nLanguageSwitchFieldProperty
+from z3c.language.switch.vocabulary import AvailableLanguagesVocabulary
+
+LANGUAGES = (1, 10, 100)
+
+_marker = object()
+
+
+class IDocument(zope.interface.Interface):
+
+    title = zope.schema.TextLine(title=u'Title', default=u'')
+
+
+class Document(object):
+
+    def __init__(self, title=u''):
+        self.title = title
+
+
+class I18nDocument(I18n):
+
+    zope.interface.implements(IDocument)
+
+    _defaultLanguage = 'l000'
+    _factory = Document
+
+    title = I18nFieldProperty(IDocument['title'])
+
+
+CompactDocument = compactTranslationFactory(IDocument, 'CompactDocument')
+
+
+class CompactI18nDocument(I18nDocument):
+    """Translations without an instance dictionary."""
+
+    _factory = CompactDocument
+
+
+class PersistentDocument(Translation):
+
+    def __init__(self, title=u''):
+        self.title = title
+
+
+class LazyI18nDocument(BTreeI18n):
+    """Translations stored in their own records and loaded on demand."""
+
+    _defaultLanguage = 'l000'
+    _factory = PersistentDocument
+
+
+class LegacyI18nDocument(I18nDocument):
+    """Sorts and scans the language list on every access like before."""
+
+    def getAvailableLanguages(self):
+        keys = list(self._getData().keys())
+        keys.sort()
+        return keys
+
+    def getAttribute(self, name, language=None):
+        if language is None:
+            language = self.getDefaultLanguage()
+        if not language in self.getAvailableLanguages():
+            raise KeyError(language)
+        return getattr(self._getData()[language], name)
+
+
+class BindPerMissFieldProperty(I18nFieldProperty):
+    """The I18nFieldProperty binding the field on every miss and write."""
+
+    def __init__(self, field, name=None):
+        super(BindPerMissFieldProperty, self).__init__(field, name)
+        self._field = field
+        self._name = name or field.__name__
+
+    def __get__(self, inst, klass):
+        if inst is None:
+            return self
+        value = inst.queryAttribute(self._name, inst.getPreferedLanguage(),
+                                    _marker)
+        if value is _marker:
+            field = self._field.bind(inst)
+            value = getattr(field, 'default', _marker)
+            if value is _marker:
+                raise AttributeError(self._name)
+        return value
+
+    def __set__(self, inst, value):
+        field = self._field.bind(inst)
+        field.validate(value)
+        inst.setAttributes(inst.getPreferedLanguage(), **{self._name: value})
+
+
+class I18nDocumentBindPerMiss(I18nDocument):
+
+    title = BindPerMissFieldProperty(IDocument['title'])
+
+
+class DocumentLanguageSwitch(I18nLanguageSwitch):
+
+    title = I18nLanguageSwitchFieldProperty(IDocument['title'])
+
+
+class Negotiator(object):
+    """Stand-in negotiator choosing the last language."""
+
+    zope.interface.implements(INegotiator)
+
+    def getLanguage(self, languages, request):
+        return languages[-1]
+
+
+def makeDocument(count, factory=I18nDocument):
+    doc = factory(title=u'Title')
+    for i in range(1, count):
+        doc.addLanguage('l%03d' % i, title=u'Title %s' % i)
+    return doc
+
+
+def setUp():
+    """Register the stand-in negotiator and start an interaction."""
+    zope.component.testing.setUp()
+    zope.component.provideUtility(Negotiator(), INegotiator)
+    zope.component.provideAdapter(
+        lambda context: zope.component.getGlobalSiteManager(),
+        (zope.interface.Interface,), IComponentLookup)
+    endInteraction()
+    newInteraction(TestRequest())
+
+
+def tearDown():
+    endInteraction()
+    zope.component.testing.tearDown()
+
+
+# hot paths, each returns the callable to measure for the given document
+def queryNegotiator(doc):
+    return lambda: negotiator.queryNegotiator(doc)
+
+def getPreferedLanguage(doc):
+    return doc.getPreferedLanguage
+
+def getAvailableLanguages(doc):
+    return doc.getAvailableLanguages
+
+def legacyGetAvailableLanguages(doc):
+    doc.__class__ = LegacyI18nDocument
+    return doc.getAvailableLanguages
+
+def getAttribute(doc):
+    language = doc.getAvailableLanguages()[-1]
+    return lambda: doc.getAttribute('title', language)
+
+def legacyGetAttribute(doc):
+    doc.__class__ = LegacyI18nDocument
+    return getAttribute(doc)
+
+def fieldPropertyGet(doc):
+    return lambda: doc.title
+
+def fieldPropertySet(doc):
+    def set():
+        doc.title = u'Title'
+    return set
+
+def _missingTitle(doc):
+    for language in doc.getAvailableLanguages():
+        del doc._getData()[language].title
+    return doc
+
+def fieldPropertyDefault(doc):
+    doc = _missingTitle(doc)
+    return lambda: doc.title
+
+def bindPerMissDefault(doc):
+    doc = _missingTitle(doc)
+    doc.__class__ = I18nDocumentBindPerMiss
+    return lambda: doc.title
+
+def bindPerMissSet(doc):
+    doc.__class__ = I18nDocumentBindPerMiss
+    def set():
+        doc.title = u'Title'
+    return set
+
+def languageSwitchGet(doc):
+    switch = DocumentLanguageSwitch(doc)
+    switch.setLanguage(doc.getAvailableLanguages()[-1])
+    return lambda: switch.title
+
+def languageSwitchSet(doc):
+    switch = DocumentLanguageSwitch(doc)
+    switch.setLanguage(doc.getAvailableLanguages()[-1])
+    def set():
+        switch.title = u'Title'
+    return set
+
+def availableLanguagesVocabulary(doc):
+    return lambda: AvailableLanguagesVocabulary(doc)
+
+
+BENCHMARKS = (
+    ('queryNegotiator', queryNegotiator),
+    ('getPreferedLanguage', getPreferedLanguage),
+    ('getAvailableLanguages', getAvailableLanguages),
+    ('legacy getAvailableLanguages', legacyGetAvailableLanguages),
+    ('getAttribute', getAttribute),
+    ('legacy getAttribute', legacyGetAttribute),
+    ('I18nFieldProperty.__get__', fieldPropertyGet),
+    ('I18nFieldProperty.__set__', fieldPropertySet),
+    ('I18nFieldProperty.__get__ default', fieldPropertyDefault),
+    ('bind per miss __get__ default', bindPerMissDefault),
+    ('bind per miss __set__', bindPerMissSet),
+    ('I18nLanguageSwitchFieldProperty.__get__', languageSwitchGet),
+    ('I18nLanguageSwitchFieldProperty.__set__', languageSwitchSet),
+    ('AvailableLanguagesVocabulary', availableLanguagesVocabulary),
+    )
+
+
+def _tracemallocAllocations(func, calls):
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        for j in xrange(calls):
+            func()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    stats = after.compare_to(before, 'filename')
+    return float(sum([s.count_diff for s in stats
+                      if s.count_diff > 0])) / calls
+
+
+def _gcAllocations(func, calls):
+    gc.collect()
+    gc.disable()
+    try:
+        before = len(gc.get_objects())
+        for j in xrange(calls):
+            func()
+        after = len(gc.get_objects())
+    finally:
+        gc.enable()
+    return float(max(after - before, 0)) / calls
+
+
+def measure(func, number=10000, repeat=3):
+    """Return the best ops/sec and the allocations per call.
+
+    The allocations are measured using tracemalloc. Without tracemalloc (on
+    Python 2) the objects tracked by the garbage collector which are left
+    over after the calls get counted instead. ``allocations_method`` names
+    the method used.
+    """
+    best = None
+    for i in range(repeat):
+        gc.disable()
+        try:
+            start = time.time()
+            for j in xrange(number):
+                func()
+            elapsed = time.time() - start
+        finally:
+            gc.enable()
+        if best is None or elapsed < best:
+            best = elapsed
+
+    calls = min(number, 1000)
+    if tracemalloc is not None:
+        method = 'tracemalloc'
+        allocations = _tracemallocAllocations(func, calls)
+    else:
+        method = 'gc'
+        allocations = _gcAllocations(func, calls)
+
+    return {'ops_per_sec': number / max(best, 1e-9),
+            'allocations': allocations,
+            'allocations_method': method}
+
+
+STORAGE_LAYOUTS = (
+    ('dict', I18nDocument),
+    ('lazy', LazyI18nDocument),
+    )
+
+
+def coldCache(factory, objects=10000, languages=30):
+    """Read one language of all objects from a FileStorage with a cold cache.
+
+    Returns the load time, the number of activated objects and the estimated
+    size of the ZODB cache.
+    """
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, 'Data.fs')
+        db = DB(FileStorage(path))
+        conn = db.open()
+        container = conn.root()['objects'] = OOBTree()
+        for i in xrange(objects):
+            container[i] = makeDocument(languages, factory)
+            if i % 1000 == 999:
+                transaction.commit()
+        transaction.commit()
+        conn.close()
+        db.close()
+
+        db = DB(FileStorage(path, read_only=True),
+                cache_size=objects * (languages + 2))
+        conn = db.open()
+        language = 'l%03d' % (languages - 1)
+        start = time.time()
+        for doc in conn.root()['objects'].values():
+            doc.getAvailableLanguages()
+            doc.getAttribute('title', language)
+        elapsed = time.time() - start
+        result = {
+            'objects': objects,
+            'languages': languages,
+            'seconds': elapsed,
+            'loaded_objects': db.cacheSize(),
+            'estimated_size': getattr(conn._cache, 'total_estimated_size',
+                                      None),
+            }
+        conn.close()
+        db.close()
+    finally:
+        shutil.rmtree(directory)
+    return result
+
+
+def runColdCache(objects=10000, languages=30, layouts=STORAGE_LAYOUTS):
+    """Run the cold cache benchmark for each storage layout."""
+    results = []
+    for name, factory in layouts:
+        result = coldCache(factory, objects, languages)
+        result['name'] = 'cold cache %s' % name
+        results.append(result)
+    return results
+
+
+TRANSLATION_LAYOUTS = (
+    ('dict', I18nDocument),
+    ('compact', CompactI18nDocument),
+    )
+
+
+def translationSize(obj):
+    """Return the size of a translation and its instance dictionary.
+
+    The attribute values are not counted, they are the same for each layout.
+    """
+    size = sys.getsizeof(obj)
+    if hasattr(obj, '__dict__'):
+        size += sys.getsizeof(obj.__dict__)
+    return size
+
+
+def memoryUsage(factory, objects=1000, languages=30):
+    """Measure the memory used by the translations of the objects in bytes."""
+    size = 0
+    for i in xrange(objects):
+        doc = makeDocument(languages, factory)
+        for obj in doc._data.values():
+            size += translationSize(obj)
+    return {
+        'objects': objects,
+        'languages': languages,
+        'bytes': size,
+        'bytes_per_translation': float(size) / (objects * languages),
+        }
+
+
+def runMemoryUsage(objects=1000, languages=30, layouts=TRANSLATION_LAYOUTS):
+    """Run the memory benchmark for each translation layout."""
+    results = []
+    for name, factory in layouts:
+        result = memoryUsage(factory, objects, languages)
+        result['name'] = 'memory %s' % name
+        results.append(result)
+    return results
+
+
+class FileStorageDatabase(object):
+    """Picklable callable opening a FileStorage database.
+
+    A FileStorage can only get opened by one process at a time.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def __call__(self):
+        return DB(FileStorage(self.path))
+
+
+class ZEODatabase(object):
+    """Picklable callable opening a database using a ZEO server."""
+
+    def __init__(self, address):
+        self.address = address
+
+    def __call__(self):
+        from ZEO.ClientStorage import ClientStorage
+        return DB(ClientStorage(self.address))
+
+
+def maintenance(openDatabase, objects=1000, languages=5, processes=None,
+                batchSize=1000):
+    """Add a language in a single loop and using the worker pool.
+
+    Returns the statistics of both runs.
+    """
+    db = openDatabase()
+    try:
+        conn = db.open()
+        container = conn.root()['maintenance'] = OOBTree()
+        for i in xrange(objects):
+            container[i] = makeDocument(languages, LazyI18nDocument)
+            if i % batchSize == batchSize - 1:
+                transaction.commit()
+        transaction.commit()
+        loop = bulk.addLanguage(container.values(), 'loop',
+                                batchSize=batchSize)
+        oids = bulk.getOids(container.values())
+        conn.close()
+    finally:
+        # release the storage for the worker processes
+        db.close()
+    loop['name'] = 'maintenance loop'
+    pool = bulk.runParallel(openDatabase, oids, bulk.AddLanguage('pool'),
+                            processes, batchSize)
+    pool['name'] = 'maintenance pool'
+    return [loop, pool]
+
+
+def runMaintenance(objects=1000, languages=5, processes=None, zeo=None):
+    """Run the maintenance benchmark against ZEO or a FileStorage.
+
+    Without ZEO a single worker process gets used.
+    """
+    if zeo is not None:
+        return maintenance(ZEODatabase(zeo), objects, languages, processes)
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, 'Data.fs')
+        return maintenance(FileStorageDatabase(path), objects, languages, 1)
+    finally:
+        shutil.rmtree(directory)
+
+
+def run(benchmarks=BENCHMARKS, languages=LANGUAGES, number=10000, repeat=3):
+    """Run the benchmarks and return a list of results."""
+    results = []
+    setUp()
+    try:
+        for count in languages:
+            for name, factory in benchmarks:
+                func = factory(makeDocument(count))
+                result = measure(func, number, repeat)
+                result['name'] = name
+                result['languages'] = count
+                results.append(result)
+    finally:
+        tearDown()
+    return results
+
+
+def main(args=None):
+    parser = optparse.OptionParser(
+        usage='%prog [options]',
+        description='Benchmark the z3c.language.switch hot paths.')
+    parser.add_option('-n', '--number', type='int', default=10000,
+        help='calls per measurement (default: %default)')
+    parser.add_option('-r', '--repeat', type='int', default=3,
+        help='measurements per benchmark (default: %default)')
+    parser.add_option('-l', '--languages', default='1,10,100',
+        help='comma separated numbers of languages (default: %default)')
+    parser.add_option('-b', '--benchmark', action='append', default=[],
+        help='run only the named benchmark, can be repeated')
+    parser.add_option('-c', '--cold-cache', type='int', default=0,
+        help='objects stored for the cold cache benchmark (default: skip)')
+    parser.add_option('--cold-cache-languages', type='int', default=30,
+        help='languages per object for the cold cache benchmark '
+             '(default: %default)')
+    parser.add_option('-m', '--memory', type='int', default=0,
+        help='objects created for the translation memory benchmark '
+             '(default: skip)')
+    parser.add_option('--memory-languages', type='int', default=30,
+        help='languages per object for the memory benchmark '
+             '(default: %default)')
+    parser.add_option('--maintenance', type='int', default=0,
+        help='objects for the bulk maintenance benchmark comparing a '
+             'single loop with the worker pool (default: skip)')
+    parser.add_option('-p', '--processes', type='int', default=None,
+        help='worker processes for the maintenance benchmark (default: '
+             'number of CPUs, 1 without ZEO)')
+    parser.add_option('--zeo',
+        help='HOST:PORT of the ZEO server used by the maintenance benchmark')
+    parser.add_option('-o', '--output',
+        help='write the JSON results to this file instead of stdout')
+    options, args = parser.parse_args(args)
+
+    languages = [int(count) for count in options.languages.split(',')]
+    benchmarks = BENCHMARKS
+    if options.benchmark:
+        benchmarks = [(name, factory) for name, factory in BENCHMARKS
+                      if name in options.benchmark]
+    results = run(benchmarks, languages, options.number, options.repeat)
+
+    data = {'python': sys.version.split()[0], 'results': results}
+    if options.cold_cache:
+        data['cold_cache'] = runColdCache(options.cold_cache,
+                                          options.cold_cache_languages)
+    if options.memory:
+        data['memory'] = runMemoryUsage(options.memory,
+                                        options.memory_languages)
+    if options.maintenance:
+        zeo = options.zeo
+        if zeo is not None:
+            host, port = zeo.rsplit(':', 1)
+            zeo = (host, int(port))
+        data['maintenance'] = runMaintenance(options.maintenance,
+                                             processes=options.processes,
+                                             zeo=zeo)
+    if options.output:
+        out = open(options.output, 'w')
+        try:
+            json.dump(data, out, indent=2, sort_keys=True)
+        finally:
+            out.close()
+    else:
+        json.dump(data, sys.stdout, indent=2, sort_keys=True)
+        sys.stdout.write('\n')
@@ -17,17 +17,67 @@ $Id$
 """
 __docformat__ = 'restructuredtext'
 
+import binascii
+from hashlib import md5
+
+try:
+    import json
+except ImportError:
+    import simplejson as json
+
+import zope.component
 import zope.interface
 from zope.publisher.browser import BrowserView
+from zope.publisher.interfaces.http import IResult
+from zope.security.checker import CheckerPublic
+from zope.security.checker import selectChecker
+from zope.security.interfaces import ForbiddenAttribute
+from zope.security.interfaces import Unauthorized
+from zope.security.management import checkPermission
+from zope.security.proxy import removeSecurityProxy
+from zope.traversing.api import traverse
+
+try:
+    from zope.intid.interfaces import IIntIds
+except ImportError:
+    IIntIds = None
 
 from z3c.language.switch import IReadI18n
 from z3c.language.switch import IAvailableLanguages
 
 
+def matchesETag(header, etag):
+    """Check the value of an ``If-None-Match`` header against an ETag.
+
+    >>> from z3c.language.switch.browser.views import matchesETag
+    >>> matchesETag('"a", W/"b"', '"b"')
+    True
+    >>> matchesETag('*', '"b"')
+    True
+    >>> matchesETag('"a"', '"b"')
+    False
+    >>> matchesETag(None, '"b"')
+    False
+
+    """
+    if not header:
+        return False
+    for tag in header.split(','):
+        tag = tag.strip()
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        if tag == '*' or tag == etag:
+            return True
+    return False
+
+
 class ContentView(BrowserView):
 
     zope.interface.implements(IAvailableLanguages)
 
+    # seconds front-end caches may keep the published results
+    maxAge = 60
+
     def getAvailableLanguages(self):
         """Returns a list of available languages if we provide IReadI18n."""
 
@@ -44,3 +94,183 @@ class ContentView(BrowserView):
             return True
         else:
             return False
+
+    def getETag(self):
+        """Return the ETag of the available languages of the context."""
+        languages = self.getAvailableLanguages()
+        # the serial is not accessible through the security proxy
+        context = removeSecurityProxy(self.context)
+        serial = getattr(context, '_p_serial', None) or ''
+        digest = md5(','.join(languages)).hexdigest()
+        return '"%s-%s"' % (binascii.hexlify(serial), digest)
+
+    def isPublic(self):
+        """Return True if everybody may read the languages of the context.
+
+        Only then shared caches may store the published results.
+        """
+        context = removeSecurityProxy(self.context)
+        checker = selectChecker(context)
+        if checker is None:
+            return False
+        permission = checker.permission_id('getAvailableLanguages')
+        return permission is CheckerPublic or permission == 'zope.Public'
+
+    # private method: set the cache headers and check If-None-Match, only
+    # used by the published JSON pages
+    def _isNotModified(self):
+        etag = self.getETag()
+        response = self.request.response
+        response.setHeader('ETag', etag)
+        if self.isPublic():
+            cacheControl = 'public, max-age=%d' % self.maxAge
+        else:
+            cacheControl = 'private, max-age=%d' % self.maxAge
+        response.setHeader('Cache-Control', cacheControl)
+        if matchesETag(self.request.getHeader('If-None-Match'), etag):
+            response.setStatus(304)
+            return True
+        return False
+
+    # private method: publish a JSON body unless the client has it already
+    def _publishJSON(self, value):
+        if self._isNotModified():
+            return ''
+        self.request.response.setHeader('Content-Type', 'application/json')
+        return json.dumps(value)
+
+    def publishAvailableLanguages(self):
+        """Publish the available languages as JSON list.
+
+        Supports conditional GET requests.
+        """
+        return self._publishJSON(list(self.getAvailableLanguages()))
+
+    def publishHasAvailableLanguages(self):
+        """Publish hasAvailableLanguages as JSON boolean.
+
+        Supports conditional GET requests.
+        """
+        return self._publishJSON(self.hasAvailableLanguages())
+
+
+class JSONLanguagesResult(object):
+    """Iterates the JSON encoded languages in chunks.
+
+    The sections map a name to an iterable of key and languages pairs, which
+    get encoded while iterating.
+
+    >>> from z3c.language.switch.browser.views import JSONLanguagesResult
+    >>> result = JSONLanguagesResult({'paths': [('/a', ('de', 'en')),
+    ...                                         ('/b', None)],
+    ...                               'intids': []}, chunkSize=1)
+    >>> list(result)
+    ['{"intids": {', '}, "paths": {', '"/a": ["de", "en"]', ', "/b": null', '}}']
+
+    """
+
+    zope.interface.implements(IResult)
+
+    def __init__(self, sections, chunkSize=100):
+        self.sections = sections
+        self.chunkSize = chunkSize
+
+    def __iter__(self):
+        prefix = '{'
+        for section in sorted(self.sections):
+            yield '%s%s: {' % (prefix, json.dumps(section))
+            prefix = '}, '
+            separator = ''
+            chunk = []
+            for key, languages in self.sections[section]:
+                if languages is not None:
+                    languages = list(languages)
+                chunk.append('%s: %s' % (json.dumps(key),
+                                         json.dumps(languages)))
+                if len(chunk) >= self.chunkSize:
+                    yield separator + ', '.join(chunk)
+                    separator = ', '
+                    chunk = []
+            if chunk:
+                yield separator + ', '.join(chunk)
+        yield '}}'
+
+
+class AvailableLanguagesBatchView(BrowserView):
+    """Publishes the available languages of many objects as JSON.
+
+    The objects get looked up by the ``paths`` relative to the context and by
+    the ``intids`` form values. Objects which can't get found or accessed
+    have ``null`` languages.
+    """
+
+    # number of objects encoded per chunk of the result
+    chunkSize = 100
+
+    def _iterPaths(self, paths):
+        # traverse the proxied context, so the intermediate containers and
+        # namespaces get checked
+        for path in paths:
+            try:
+                obj = traverse(self.context, path, None)
+            except (Unauthorized, ForbiddenAttribute):
+                obj = None
+            yield path, obj
+
+    def _iterIntIds(self, uids):
+        intids = None
+        if IIntIds is not None:
+            intids = zope.component.queryUtility(IIntIds)
+        for uid in uids:
+            obj = None
+            if intids is not None:
+                try:
+                    obj = intids.queryObject(int(uid))
+                except ValueError:
+                    pass
+            yield str(uid), obj
+
+    def _iterLanguages(self, items):
+        """Generate the key and languages of the accessible objects.
+
+        The objects get resolved, checked and read one at a time and are not
+        kept. The permission protecting getAvailableLanguages gets looked up
+        once per class.
+        """
+        permissions = {}
+        for key, obj in items:
+            languages = None
+            obj = removeSecurityProxy(obj)
+            if obj is not None:
+                cls = type(obj)
+                if cls not in permissions:
+                    checker = selectChecker(obj)
+                    permission = None
+                    if checker is not None:
+                        permission = checker.permission_id(
+                            'getAvailableLanguages')
+                    permissions[cls] = permission
+                permission = permissions[cls]
+                if permission is not None and (permission is CheckerPublic or
+                    checkPermission(permission, obj)):
+                    if IReadI18n.providedBy(obj):
+                        languages = tuple(obj.getAvailableLanguages())
+                    else:
+                        languages = ()
+            obj = None
+            yield key, languages
+
+    def __call__(self, paths=(), intids=()):
+        if isinstance(paths, basestring):
+            paths = [paths]
+        if isinstance(intids, basestring):
+            intids = [intids]
+        # The publisher closes the database connection and ends the
+        # interaction before it iterates the result. Therefore the languages
+        # get read while publishing, only the language tuples are kept.
+        sections = {
+            'paths': list(self._iterLanguages(self._iterPaths(paths))),
+            'intids': list(self._iterLanguages(self._iterIntIds(intids))),
+            }
+        self.request.response.setHeader('Content-Type', 'application/json')
+        return JSONLanguagesResult(sections, self.chunkSize)
@@ -0,0 +1,335 @@
+##############################################################################
+#
+# Copyright (c) 2005 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Bulk operations on the II18n objects of a container tree.
+
+$Id$
+"""
+__docformat__ = 'restructuredtext'
+
+import multiprocessing
+import time
+import transaction
+import zope.interface
+import zope.schema
+from ZODB.POSException import ConflictError
+from zope.app.generations.utility import findObjectsProviding
+
+from z3c.language.switch import II18n
+from z3c.language.switch.event import suppressEvents
+
+
+def findI18nObjects(root):
+    """Generate the II18n objects of a container tree."""
+    return findObjectsProviding(root, II18n)
+
+
+def applyToObjects(objects, operation, batchSize=1000, savepoint=100,
+                   progress=None):
+    """Apply an operation to each object and commit in batches.
+
+    The events of the I18n objects get suppressed.
+
+    Parameter:
+
+    objects -- Iterable of II18n objects, e.g. findI18nObjects(root).
+
+    operation -- Callable changing an object, returns True if the object got
+                 changed.
+
+    batchSize -- Number of objects per transaction, None for commit once at
+                 the end.
+
+    savepoint -- Number of objects per savepoint, None for no savepoints.
+
+    progress -- Callable getting the statistics after each commit.
+
+    Return Value:
+
+    dict -- Number of processed and changed objects, seconds and objects per
+            second.
+
+    """
+    stats = {'objects': 0, 'changed': 0, 'seconds': 0.0, 'per_second': 0.0}
+    start = time.time()
+
+    def commit():
+        transaction.commit()
+        stats['seconds'] = seconds = time.time() - start
+        stats['per_second'] = stats['objects'] / max(seconds, 1e-9)
+        if progress is not None:
+            progress(dict(stats))
+
+    with suppressEvents():
+        for obj in objects:
+            if operation(obj):
+                stats['changed'] += 1
+            stats['objects'] += 1
+            count = stats['objects']
+            if batchSize and count % batchSize == 0:
+                commit()
+            elif savepoint and count % savepoint == 0:
+                transaction.savepoint(optimistic=True)
+        if not batchSize or stats['objects'] % batchSize:
+            commit()
+    return stats
+
+
+class AddLanguage(object):
+    """Operation adding a language to the objects which don't have it.
+
+    The new translations get created with the keyword arguments ``kws``, by
+    ``_defaultArgs`` otherwise.
+    """
+
+    def __init__(self, language, kws=None):
+        self.language = language
+        self.kws = kws or {}
+
+    def __call__(self, obj):
+        if self.language in obj.getAvailableLanguages():
+            return False
+        obj.addLanguage(self.language, **self.kws)
+        return True
+
+
+class RemoveLanguage(object):
+    """Operation removing a language from the objects which have it.
+
+    Objects using the language as default language are left alone.
+    """
+
+    def __init__(self, language):
+        self.language = language
+
+    def __call__(self, obj):
+        if (self.language == obj.getDefaultLanguage() or
+            self.language not in obj.getAvailableLanguages()):
+            return False
+        obj.removeLanguage(self.language)
+        return True
+
+
+class CopyLanguage(object):
+    """Operation adding a language with the values of the default language.
+
+    The attributes ``names`` get copied, objects which have the language
+    already are left alone.
+    """
+
+    def __init__(self, language, names):
+        self.language = language
+        self.names = tuple(names)
+
+    def __call__(self, obj):
+        if self.language in obj.getAvailableLanguages():
+            return False
+        values = obj.getAttributes(self.names, obj.getDefaultLanguage())
+        obj.addLanguage(self.language)
+        obj.setAttributes(self.language, **values)
+        return True
+
+
+class ValidateSchema(object):
+    """Operation validating the translations against a schema.
+
+    Each field gets validated in each available language, missing values
+    get replaced by the field default. The invalid objects get reported in
+    ``invalid`` which maps the oid (the object if it is not persistent) to a
+    list of (language, field name, error class name) tuples. The objects
+    never get changed.
+    """
+
+    def __init__(self, schema):
+        self.schema = schema
+        self.invalid = {}
+
+    def __call__(self, obj):
+        errors = []
+        fields = zope.schema.getFieldsInOrder(self.schema)
+        for language in obj.getAvailableLanguages():
+            for name, field in fields:
+                field = field.bind(obj)
+                value = obj.queryAttribute(name, language, field.default)
+                try:
+                    field.validate(value)
+                except zope.interface.Invalid as e:
+                    errors.append((language, name, e.__class__.__name__))
+        key = getattr(obj, '_p_oid', None)
+        if key is None:
+            key = obj
+        if errors:
+            self.invalid[key] = errors
+        else:
+            # a retried batch may be valid now
+            self.invalid.pop(key, None)
+        return False
+
+
+def addLanguage(objects, language, kws=None, batchSize=1000, savepoint=100,
+                progress=None):
+    """Add a language to the objects which don't have it, see AddLanguage."""
+    return applyToObjects(objects, AddLanguage(language, kws), batchSize,
+                          savepoint, progress)
+
+
+def removeLanguage(objects, language, batchSize=1000, savepoint=100,
+                   progress=None):
+    """Remove a language from the objects which have it, see RemoveLanguage.
+    """
+    return applyToObjects(objects, RemoveLanguage(language), batchSize,
+                          savepoint, progress)
+
+
+def validateSchema(objects, schema, batchSize=1000, savepoint=100,
+                   progress=None):
+    """Validate the translations of the objects, see ValidateSchema.
+
+    The statistics contain the ``invalid`` objects.
+    """
+    operation = ValidateSchema(schema)
+    stats = applyToObjects(objects, operation, batchSize, savepoint, progress)
+    stats['invalid'] = operation.invalid
+    return stats
+
+
+def getOids(objects):
+    """Return the sorted oids of the persistent objects."""
+    oids = [obj._p_oid for obj in objects
+            if getattr(obj, '_p_oid', None) is not None]
+    oids.sort()
+    return oids
+
+
+def splitOids(oids, parts):
+    """Split the sorted oids into the given number of oid ranges.
+
+    >>> from z3c.language.switch.bulk import splitOids
+    >>> splitOids(range(10), 3)
+    [[0, 1, 2, 3], [4, 5, 6], [7, 8, 9]]
+    >>> splitOids(range(2), 3)
+    [[0], [1]]
+
+    """
+    ranges = []
+    start = 0
+    for part in xrange(parts):
+        end = start + (len(oids) - start) // (parts - part)
+        if (len(oids) - start) % (parts - part):
+            end += 1
+        if end > start:
+            ranges.append(oids[start:end])
+        start = end
+    return ranges
+
+
+def processOids(db, oids, operation, batchSize=1000, retries=3):
+    """Apply an operation to the objects in a new connection of the database.
+
+    The objects get committed in batches. A batch gets retried up to
+    ``retries`` times if a ConflictError occurs. The events of the I18n
+    objects get suppressed.
+
+    Return Value:
+
+    dict -- Number of processed and changed objects, conflicts and seconds.
+            The ``invalid`` objects of operations like ValidateSchema.
+
+    """
+    stats = {'objects': 0, 'changed': 0, 'conflicts': 0, 'seconds': 0.0}
+    start = time.time()
+    tm = transaction.TransactionManager()
+    conn = db.open(tm)
+    try:
+        with suppressEvents():
+            for index in xrange(0, len(oids), batchSize):
+                batch = oids[index:index + batchSize]
+                for attempt in xrange(retries + 1):
+                    changed = 0
+                    try:
+                        tm.begin()
+                        for oid in batch:
+                            if operation(conn.get(oid)):
+                                changed += 1
+                        tm.commit()
+                    except ConflictError:
+                        tm.abort()
+                        stats['conflicts'] += 1
+                        if attempt == retries:
+                            raise
+                    else:
+                        break
+                stats['objects'] += len(batch)
+                stats['changed'] += changed
+    finally:
+        # leave the transaction of a failed batch before closing
+        tm.abort()
+        conn.close()
+    invalid = getattr(operation, 'invalid', None)
+    if invalid is not None:
+        stats['invalid'] = invalid
+    stats['seconds'] = time.time() - start
+    return stats
+
+
+def _processRange(job):
+    # runs in the worker processes, opens its own database
+    openDatabase, oids, operation, batchSize, retries = job
+    db = openDatabase()
+    try:
+        return processOids(db, oids, operation, batchSize, retries)
+    finally:
+        db.close()
+
+
+def runParallel(openDatabase, oids, operation, processes=None,
+                batchSize=1000, retries=3):
+    """Apply an operation to the objects using a pool of worker processes.
+
+    The oids get split into one oid range per process. Each worker opens the
+    database using ``openDatabase`` and processes its range, see
+    processOids. ``openDatabase`` and ``operation`` get pickled, use
+    module level callables. With one process the range gets processed in the
+    current process.
+
+    Return Value:
+
+    dict -- Number of processed and changed objects, conflicts, seconds and
+            objects per second. The ``invalid`` objects of all workers for
+            operations like ValidateSchema.
+
+    """
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    jobs = [(openDatabase, part, operation, batchSize, retries)
+            for part in splitOids(oids, processes)]
+    start = time.time()
+    if processes == 1:
+        results = map(_processRange, jobs)
+    else:
+        pool = multiprocessing.Pool(processes)
+        try:
+            results = pool.map(_processRange, jobs)
+        finally:
+            pool.close()
+            pool.join()
+    stats = {'objects': 0, 'changed': 0, 'conflicts': 0,
+             'processes': processes}
+    for result in results:
+        for name in ('objects', 'changed', 'conflicts'):
+            stats[name] += result[name]
+        if 'invalid' in result:
+            stats.setdefault('invalid', {}).update(result['invalid'])
+    stats['seconds'] = seconds = time.time() - start
+    stats['per_second'] = stats['objects'] / max(seconds, 1e-9)
+    return stats
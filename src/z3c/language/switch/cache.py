@@ -0,0 +1,390 @@
+##############################################################################
+#
+# Copyright (c) 2005 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Bounded caches shared between threads.
+
+$Id$
+"""
+__docformat__ = 'restructuredtext'
+
+import sys
+import threading
+import zope.interface
+
+_PREV, _NEXT, _KEY, _VALUE = 0, 1, 2, 3
+
+_marker = object()
+
+# values of these types can be shared between database connections
+CACHEABLE_TYPES = (unicode, str, int, long, float, bool, type(None))
+
+
+class LRUCache(object):
+    """Thread safe cache dropping the least recently used entries.
+
+    >>> from z3c.language.switch.cache import LRUCache
+    >>> cache = LRUCache(maxsize=2)
+    >>> cache.set('a', 1)
+    >>> cache.set('b', 2)
+    >>> cache.get('a')
+    1
+    >>> cache.set('c', 3)
+    >>> cache.get('b') is None
+    True
+    >>> sorted(cache.keys())
+    ['a', 'c']
+    >>> cache.pop('a')
+    1
+    >>> len(cache)
+    1
+    >>> sorted(cache.getStatistics().items())
+    [('hits', 1), ('maxsize', 2), ('misses', 1), ('ratio', 0.5), ('size', 1)]
+
+    """
+
+    def __init__(self, maxsize=1000):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        self._lock.acquire()
+        try:
+            self._data = {}
+            # circular doubly linked list, the root's next is the oldest
+            root = self._root = []
+            root[:] = [root, root, None, None]
+            self.hits = 0
+            self.misses = 0
+        finally:
+            self._lock.release()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def keys(self):
+        return self._data.keys()
+
+    def get(self, key, default=None):
+        self._lock.acquire()
+        try:
+            link = self._data.get(key)
+            if link is None:
+                self.misses += 1
+                return default
+            self._unlink(link)
+            self._append(link)
+            self.hits += 1
+            return link[_VALUE]
+        finally:
+            self._lock.release()
+
+    def set(self, key, value):
+        self._lock.acquire()
+        try:
+            link = self._data.get(key)
+            if link is not None:
+                self._unlink(link)
+                link[_VALUE] = value
+            else:
+                link = self._data[key] = [None, None, key, value]
+                self._added(key)
+                while len(self._data) > self.maxsize:
+                    self._remove(self._root[_NEXT][_KEY])
+            self._append(link)
+        finally:
+            self._lock.release()
+
+    def pop(self, key, default=None):
+        self._lock.acquire()
+        try:
+            return self._remove(key, default)
+        finally:
+            self._lock.release()
+
+    def getStatistics(self):
+        lookups = self.hits + self.misses
+        ratio = 0.0
+        if lookups:
+            ratio = float(self.hits) / lookups
+        return {'hits': self.hits,
+                'misses': self.misses,
+                'ratio': ratio,
+                'size': len(self._data),
+                'maxsize': self.maxsize}
+
+    # private helpers, the lock must be held
+    def _remove(self, key, default=None):
+        link = self._data.pop(key, None)
+        if link is None:
+            return default
+        self._unlink(link)
+        self._removed(key)
+        return link[_VALUE]
+
+    def _added(self, key):
+        """Called for each new key, subclasses may overwrite this method."""
+
+    def _removed(self, key):
+        """Called for each removed key, subclasses may overwrite this method."""
+
+    def _unlink(self, link):
+        link[_PREV][_NEXT] = link[_NEXT]
+        link[_NEXT][_PREV] = link[_PREV]
+
+    def _append(self, link):
+        root = self._root
+        last = root[_PREV]
+        link[_PREV] = last
+        link[_NEXT] = root
+        last[_NEXT] = root[_PREV] = link
+
+
+class ValueCache(LRUCache):
+    """Caches the attribute values of committed i18n objects.
+
+    The keys contain the database, oid and serial of the record storing the
+    translations, see ``I18n._getCacheKey``. Committed changes create a new
+    serial, so entries of older revisions are never used again and get
+    dropped by the LRU. Objects which are not committed or changed in the
+    current transaction are read without the cache. Only immutable values
+    get cached, since the values are shared between connections.
+
+    The entries of an object get dropped if it changes in a storage wrapped
+    by WatchingStorage. Values read from revisions older than the last
+    invalidation, e.g. by connections which did not sync yet, don't get
+    cached.
+    """
+
+    def clear(self):
+        # keys by database name and oid
+        self._oids = {}
+        # last invalidated transaction by database name and oid
+        self._tids = LRUCache(self.maxsize)
+        super(ValueCache, self).clear()
+
+    def _added(self, key):
+        oid = key[:2]
+        keys = self._oids.get(oid)
+        if keys is None:
+            keys = self._oids[oid] = set()
+        keys.add(key)
+
+    def _removed(self, key):
+        oid = key[:2]
+        keys = self._oids.get(oid)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._oids[oid]
+
+    def invalidate(self, databaseName, tid, oids):
+        """Drop the entries of the objects changed by a transaction."""
+        self._lock.acquire()
+        try:
+            for oid in oids:
+                oid = (databaseName, oid)
+                self._tids.set(oid, tid)
+                for key in list(self._oids.get(oid, ())):
+                    self._remove(key)
+        finally:
+            self._lock.release()
+
+    def invalidateDatabase(self, databaseName):
+        """Drop all entries of a database."""
+        self._lock.acquire()
+        try:
+            for oid in [oid for oid in self._oids if oid[0] == databaseName]:
+                for key in list(self._oids[oid]):
+                    self._remove(key)
+        finally:
+            self._lock.release()
+
+    def isCurrent(self, key):
+        """Return False if the revision of the key got invalidated."""
+        tid = self._tids.get(key[:2])
+        return tid is None or key[2] >= tid
+
+    def getKey(self, i18n, language, name):
+        """Return the cache key or None if the value can't get cached."""
+        getCacheKey = getattr(i18n, '_getCacheKey', None)
+        if getCacheKey is None:
+            return None
+        key = getCacheKey()
+        if key is None:
+            return None
+        return key + (language, name)
+
+    def queryAttribute(self, i18n, name, language, default=None):
+        """Read an attribute of an i18n object using the cache."""
+        key = self.getKey(i18n, language, name)
+        if key is None:
+            return i18n.queryAttribute(name, language, default)
+        value = self.get(key, _marker)
+        if value is _marker:
+            value = i18n.queryAttribute(name, language, _marker)
+            if value is _marker:
+                return default
+            if type(value) in CACHEABLE_TYPES and self.isCurrent(key):
+                self.set(key, value)
+        return value
+
+    def getMemoryUsage(self):
+        """Estimate the memory used by the cache entries in bytes."""
+        self._lock.acquire()
+        try:
+            links = self._data.values()
+        finally:
+            self._lock.release()
+        size = sys.getsizeof(self._data)
+        for link in links:
+            key = link[_KEY]
+            size += sys.getsizeof(link) + sys.getsizeof(key)
+            size += sum([sys.getsizeof(part) for part in key])
+            size += sys.getsizeof(link[_VALUE])
+        return size
+
+    def getStatistics(self):
+        statistics = super(ValueCache, self).getStatistics()
+        statistics['memory'] = self.getMemoryUsage()
+        return statistics
+
+
+# the shared value cache, None if disabled
+valueCache = None
+
+
+def enableValueCache(maxsize=10000):
+    """Enable the value cache used by the i18n field properties."""
+    global valueCache
+    valueCache = ValueCache(maxsize)
+    return valueCache
+
+
+def disableValueCache():
+    """Disable the value cache."""
+    global valueCache
+    valueCache = None
+
+
+def invalidateValues(databaseName, tid, oids):
+    """Drop the value cache entries of the invalidated objects."""
+    cache = valueCache
+    if cache is not None:
+        cache.invalidate(databaseName, tid, oids)
+
+
+def invalidateDatabaseValues(databaseName):
+    """Drop the value cache entries of a database."""
+    cache = valueCache
+    if cache is not None:
+        cache.invalidateDatabase(databaseName)
+
+
+class _InvalidationListener(object):
+    """Registered with the storage in place of the database."""
+
+    def __init__(self, db, databaseName):
+        self._db = db
+        self._databaseName = databaseName
+
+    def invalidate(self, tid, oids, *args, **kw):
+        invalidateValues(self._databaseName, tid, oids)
+        return self._db.invalidate(tid, oids, *args, **kw)
+
+    def invalidateCache(self, *args, **kw):
+        invalidateDatabaseValues(self._databaseName)
+        return self._db.invalidateCache(*args, **kw)
+
+    def __getattr__(self, name):
+        return getattr(self._db, name)
+
+
+class WatchingStorage(object):
+    """Storage wrapper dropping the value cache entries of changed objects.
+
+    The entries get dropped for the commits of the local connections and
+    for the invalidations other ZEO clients send. Only the public storage
+    API gets used: the oids stored in a transaction get invalidated when it
+    finishes, and the database gets wrapped when it registers with the
+    storage. Create the database with the wrapped storage and the same
+    database name::
+
+      db = DB(WatchingStorage(FileStorage('Data.fs'), 'main'),
+              database_name='main')
+
+    Storages providing their own MVCC, like RelStorage, don't register the
+    database. Then the values are still validated by their serial.
+    """
+
+    # methods storing an object, the transaction is the last argument
+    _storing = ('store', 'storeBlob', 'restore', 'deleteObject')
+
+    def __init__(self, storage, databaseName='unnamed'):
+        self._storage = storage
+        self._databaseName = databaseName
+        self._stored = {}
+        zope.interface.directlyProvides(self,
+                                        zope.interface.providedBy(storage))
+
+    def __getattr__(self, name):
+        # only wrap the methods the storage has
+        method = getattr(self._storage, name)
+        if name in self._storing:
+            def store(*args, **kw):
+                self._getStored(args[-1]).add(args[0])
+                return method(*args, **kw)
+            return store
+        if name == 'undo':
+            def undo(transaction_id, transaction):
+                result = method(transaction_id, transaction)
+                if result:
+                    # ZODB 4 and later return the tid and the undone oids
+                    self._getStored(transaction).update(result[1])
+                return result
+            return undo
+        return method
+
+    def _getStored(self, transaction):
+        stored = self._stored.get(id(transaction))
+        if stored is None:
+            stored = self._stored[id(transaction)] = set()
+        return stored
+
+    def registerDB(self, db):
+        registerDB = getattr(self._storage, 'registerDB', None)
+        if registerDB is not None:
+            registerDB(_InvalidationListener(db, self._databaseName))
+
+    def tpc_finish(self, transaction, func=lambda tid: None):
+        stored = self._stored.pop(id(transaction), ())
+        def finish(tid):
+            if stored:
+                invalidateValues(self._databaseName, tid, stored)
+            func(tid)
+        return self._storage.tpc_finish(transaction, finish)
+
+    def tpc_abort(self, transaction):
+        self._stored.pop(id(transaction), None)
+        return self._storage.tpc_abort(transaction)
+
+
+try:
+    from zope.testing.cleanup import addCleanUp
+except ImportError:
+    pass
+else:
+    addCleanUp(disableValueCache)
@@ -0,0 +1,116 @@
+##############################################################################
+#
+# Copyright (c) 2005 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""The request and language of the current thread.
+
+$Id$
+"""
+__docformat__ = 'restructuredtext'
+
+import threading
+import zope.component
+from zope.publisher.interfaces import IEndRequestEvent
+from zope.publisher.interfaces import IStartRequestEvent
+
+_local = threading.local()
+
+
+def setRequest(request):
+    """Set the request of the current thread."""
+    _local.request = request
+
+
+def clearRequest():
+    """Forget the request of the current thread."""
+    _local.request = None
+
+
+def queryRequest():
+    """Return the request of the current thread or None."""
+    return getattr(_local, 'request', None)
+
+
+@zope.component.adapter(IStartRequestEvent)
+def startRequest(event):
+    """Remember the published request for the current thread."""
+    setRequest(event.request)
+
+
+@zope.component.adapter(IEndRequestEvent)
+def endRequest(event):
+    """Forget the published request at the end of the request."""
+    if queryRequest() is event.request:
+        clearRequest()
+
+
+def queryLanguage():
+    """Return the language of the current thread or None."""
+    return getattr(_local, 'language', None)
+
+
+def setLanguage(language):
+    """Set the language of the current thread.
+
+    Returns a token for restore the previous language using resetLanguage.
+    """
+    token = (queryLanguage(),)
+    _local.language = language
+    return token
+
+
+def resetLanguage(token):
+    """Restore the language replaced by setLanguage."""
+    _local.language = token[0]
+
+
+def clearLanguage():
+    _local.language = None
+
+
+class language(object):
+    """Context manager setting the current language.
+
+    ``I18n.getPreferedLanguage`` returns the current language if it is
+    available and new ``I18nLanguageSwitch`` adapters start with it if it is
+    available. The language gets stored per thread:
+
+    >>> from z3c.language.switch import context
+    >>> with context.language('de'):
+    ...     with context.language('fr'):
+    ...         print context.queryLanguage()
+    ...     print context.queryLanguage()
+    fr
+    de
+    >>> context.queryLanguage() is None
+    True
+
+    """
+
+    def __init__(self, language):
+        self.language = language
+
+    def __enter__(self):
+        self._token = setLanguage(self.language)
+        return self.language
+
+    def __exit__(self, type, value, traceback):
+        resetLanguage(self._token)
+
+
+try:
+    from zope.testing.cleanup import addCleanUp
+except ImportError:
+    pass
+else:
+    addCleanUp(clearRequest)
+    addCleanUp(clearLanguage)
@@ -0,0 +1,225 @@
+##############################################################################
+#
+# Copyright (c) 2005 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Modification events of I18n objects.
+
+$Id$
+"""
+__docformat__ = 'restructuredtext'
+
+import threading
+import transaction
+import zope.event
+import zope.interface
+import zope.lifecycleevent
+
+from z3c.language.switch.interfaces import ILanguageAttributes
+from z3c.language.switch.interfaces import II18nModifiedEvent
+from z3c.language.switch.interfaces import II18nLanguageAddedEvent
+from z3c.language.switch.interfaces import II18nLanguageRemovedEvent
+
+_local = threading.local()
+
+# the changes of a language besides its attributes
+ADDED = 'added'
+REMOVED = 'removed'
+
+
+class LanguageAttributes(zope.lifecycleevent.Attributes):
+    """Describes the modified attributes of a translation."""
+
+    zope.interface.implements(ILanguageAttributes)
+
+    def __init__(self, language, *attributes, **kw):
+        super(LanguageAttributes, self).__init__(None, *attributes)
+        self.language = language
+        self.change = kw.get('change')
+
+
+class I18nModifiedEvent(zope.lifecycleevent.ObjectModifiedEvent):
+    """The translations of an I18n object have been modified."""
+
+    zope.interface.implements(II18nModifiedEvent)
+
+    change = None
+
+    def __init__(self, object, language, names=(), *descriptions):
+        names = tuple(names)
+        if not descriptions:
+            descriptions = (LanguageAttributes(language, change=self.change,
+                                               *names),)
+        super(I18nModifiedEvent, self).__init__(object, *descriptions)
+        self.language = language
+        self.names = names
+
+
+class I18nLanguageAddedEvent(I18nModifiedEvent):
+    """A language has been added to an I18n object."""
+
+    zope.interface.implements(II18nLanguageAddedEvent)
+
+    change = ADDED
+
+
+class I18nLanguageRemovedEvent(I18nModifiedEvent):
+    """A language has been removed from an I18n object."""
+
+    zope.interface.implements(II18nLanguageRemovedEvent)
+
+    change = REMOVED
+
+
+_factories = {
+    None: I18nModifiedEvent,
+    ADDED: I18nLanguageAddedEvent,
+    REMOVED: I18nLanguageRemovedEvent,
+    }
+
+
+class ModifiedEventCollector(object):
+    """Collects the modified languages and attributes per object.
+
+    The last addition or removal of a language is kept.
+    """
+
+    def __init__(self):
+        self._objects = []
+        self._changes = {}
+
+    def __len__(self):
+        return len(self._objects)
+
+    def add(self, obj, language, names=(), change=None):
+        changes = self._changes.get(id(obj))
+        if changes is None:
+            changes = self._changes[id(obj)] = {}
+            self._objects.append(obj)
+        entry = changes.get(language)
+        if entry is None:
+            entry = changes[language] = [None, set()]
+        if change is not None:
+            entry[0] = change
+        entry[1].update(names)
+
+    def flush(self):
+        """Notify one I18nModifiedEvent per collected object.
+
+        If only one language changed, the event is an
+        I18nLanguageAddedEvent or I18nLanguageRemovedEvent if the language
+        got added or removed.
+        """
+        objects, changes = self._objects, self._changes
+        self._objects = []
+        self._changes = {}
+        for obj in objects:
+            languages = changes[id(obj)].items()
+            languages.sort()
+            if len(languages) == 1:
+                language, (change, names) = languages[0]
+                event = _factories[change](obj, language, sorted(names))
+            else:
+                descriptions = [LanguageAttributes(language, change=change,
+                                                   *sorted(names))
+                                for language, (change, names) in languages]
+                event = I18nModifiedEvent(obj, None, (), *descriptions)
+            zope.event.notify(event)
+
+
+def getCollector():
+    """Return the active collector or None."""
+    collector = getattr(_local, 'collector', None)
+    if collector is not None:
+        return collector
+    pending = getattr(_local, 'transaction', None)
+    if pending is not None:
+        txn, collector = pending
+        if txn is transaction.get():
+            return collector
+        # the transaction got aborted, forget its changes
+        _local.transaction = None
+    return None
+
+
+class batchModifiedEvents(object):
+    """Context manager coalescing the modified events of I18n objects.
+
+    One I18nModifiedEvent per object gets notified when the outermost
+    block exits. The events get notified also if the block raises an
+    error, because the changes made so far are not undone.
+    """
+
+    def __enter__(self):
+        self.collector = None
+        if getattr(_local, 'collector', None) is None:
+            self.collector = _local.collector = ModifiedEventCollector()
+        return _local.collector
+
+    def __exit__(self, type, value, tb):
+        if self.collector is not None:
+            _local.collector = None
+            self.collector.flush()
+
+
+def batchModifiedEventsInTransaction():
+    """Coalesce the modified events of I18n objects until the commit.
+
+    The events get notified in a before commit hook of the current
+    transaction. Returns the collector.
+    """
+    txn = transaction.get()
+    pending = getattr(_local, 'transaction', None)
+    if pending is not None and pending[0] is txn:
+        return pending[1]
+
+    collector = ModifiedEventCollector()
+    _local.transaction = (txn, collector)
+
+    def flush():
+        pending = getattr(_local, 'transaction', None)
+        if pending is not None and pending[1] is collector:
+            _local.transaction = None
+        collector.flush()
+
+    txn.addBeforeCommitHook(flush)
+    return collector
+
+
+class suppressEvents(object):
+    """Context manager suppressing the events of I18n objects.
+
+    Neither the modified events nor the created events of new translations
+    get notified for the changes made in the block.
+    """
+
+    def __enter__(self):
+        _local.suppressed = getattr(_local, 'suppressed', 0) + 1
+
+    def __exit__(self, type, value, tb):
+        _local.suppressed -= 1
+
+
+def eventsSuppressed():
+    """Return True if the events of I18n objects are suppressed."""
+    return getattr(_local, 'suppressed', 0) > 0
+
+
+def notifyModified(obj, language, names=(), factory=I18nModifiedEvent):
+    """Notify or collect the modification of an I18n object."""
+    if eventsSuppressed():
+        return
+    collector = getCollector()
+    if collector is None:
+        zope.event.notify(factory(obj, language, names))
+    else:
+        collector.add(obj, language, names,
+                      getattr(factory, 'change', None))
@@ -0,0 +1,144 @@
+##############################################################################
+#
+# Copyright (c) 2005 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Streaming import and export of translations.
+
+Translations get exchanged as records of ``(path, language, attribute,
+value)``. All functions work on generators and keep only the records of one
+object in memory.
+
+$Id$
+"""
+__docformat__ = 'restructuredtext'
+
+import csv
+import itertools
+import transaction
+
+try:
+    import json
+except ImportError:
+    import simplejson as json
+
+from z3c.language.switch.event import batchModifiedEvents
+
+_marker = object()
+
+
+def exportTranslations(objects, names, getPath):
+    """Generate the translation records of the given II18n objects.
+
+    Parameter:
+
+    objects -- Iterable of II18n objects.
+
+    names -- Attribute names to export.
+
+    getPath -- Callable returning the path of an object.
+
+    """
+    for obj in objects:
+        path = getPath(obj)
+        for language in obj.getAvailableLanguages():
+            values = obj.getAttributes(names, language, _marker)
+            for name in names:
+                value = values[name]
+                if value is not _marker:
+                    yield (path, language, name, value)
+
+
+def importTranslations(records, resolve, savepoint=100):
+    """Write the translation records to the objects.
+
+    The records of one object must follow each other. Missing languages get
+    added using ``IWriteI18n.addLanguage`` without arguments (see
+    ``I18n._defaultArgs``), then the attribute values get set once. One
+    modified event gets notified per object and a savepoint gets made every
+    ``savepoint`` objects.
+
+    Parameter:
+
+    records -- Iterable of ``(path, language, attribute, value)`` tuples.
+
+    resolve -- Callable returning the II18n object of a path, None for an
+               unknown path.
+
+    savepoint -- Number of objects per savepoint, None for no savepoints.
+
+    Return Value:
+
+    tuple -- Number of imported objects and records.
+
+    Exceptions:
+
+    ValueError -- If a path is unknown. The objects imported before are
+                  changed, abort the transaction if needed.
+
+    """
+    objects = count = 0
+    for path, group in itertools.groupby(records, lambda record: record[0]):
+        obj = resolve(path)
+        if obj is None:
+            raise ValueError(
+                'cannot import translations of unknown path (%s)' % path)
+        languages = {}
+        for path, language, name, value in group:
+            languages.setdefault(str(language), {})[str(name)] = value
+            count += 1
+
+        with batchModifiedEvents():
+            for language, kws in languages.items():
+                if language not in obj.getAvailableLanguages():
+                    obj.addLanguage(language)
+                obj.setAttributes(language, **kws)
+
+        objects += 1
+        if savepoint and objects % savepoint == 0:
+            transaction.savepoint(optimistic=True)
+
+    return objects, count
+
+
+def writeJSONLines(records, stream):
+    """Write the records as one JSON list per line."""
+    for record in records:
+        stream.write(json.dumps(list(record)))
+        stream.write('\n')
+
+
+def readJSONLines(stream):
+    """Generate the records of a JSON lines stream."""
+    for line in stream:
+        line = line.strip()
+        if line:
+            yield tuple(json.loads(line))
+
+
+def writeCSV(records, stream, encoding='utf-8'):
+    """Write the records as CSV rows."""
+    writer = csv.writer(stream, lineterminator='\n')
+    for record in records:
+        writer.writerow([_encode(value, encoding) for value in record])
+
+
+def readCSV(stream, encoding='utf-8'):
+    """Generate the records of a CSV stream, the values are unicode."""
+    for row in csv.reader(stream):
+        if row:
+            yield tuple([value.decode(encoding) for value in row])
+
+
+def _encode(value, encoding):
+    if isinstance(value, unicode):
+        return value.encode(encoding)
+    return str(value)
@@ -24,5 +24,5 @@ pkg = 'z3c.language.switch.generations'
 
 schemaManager = SchemaManager(
     minimum_generation=0,
-    generation=0,
+    generation=1,
     package_name=pkg)
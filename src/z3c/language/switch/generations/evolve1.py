@@ -0,0 +1,61 @@
+##############################################################################
+#
+# Copyright (c) 2005 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Evolve to generation 1: migrate the translation storage of I18n objects.
+
+Objects of classes which use another ``_dataFactory`` (e.g. ``BTreeI18n``)
+get their translations moved from the plain dict into the new mapping.
+
+  >>> import transaction
+  >>> from ZODB.MappingStorage import DB
+  >>> from persistent.mapping import PersistentMapping
+  >>> from zope.app.generations.generations import Context
+  >>> from z3c.language.switch.testing import BTreeI18nDocument
+
+  >>> db = DB()
+  >>> context = Context()
+  >>> context.connection = db.open()
+  >>> root = context.connection.root()
+  >>> root['Application'] = app = PersistentMapping()
+  >>> app['doc'] = doc = BTreeI18nDocument(title=u'Title')
+  >>> doc.addLanguage('de', title=u'Titel')
+  >>> doc._data = dict(doc._data.items())
+  >>> transaction.commit()
+
+  >>> evolve(context)
+  >>> transaction.commit()
+  >>> doc._data
+  <BTrees.OOBTree.OOBTree object at ...>
+  >>> doc.getAttribute('title', 'de')
+  u'Titel'
+
+  >>> context.connection.close()
+  >>> db.close()
+
+$Id$
+"""
+__docformat__ = "reStructuredText"
+
+from zope.app.generations.utility import findObjectsProviding
+from zope.app.generations.utility import getRootFolder
+
+from z3c.language.switch import II18n
+from z3c.language.switch.app import I18n
+
+
+def evolve(context):
+    """Migrate the translation storage of all I18n objects."""
+    root = getRootFolder(context)
+    for obj in findObjectsProviding(root, II18n):
+        if isinstance(obj, I18n):
+            obj._evolveData()
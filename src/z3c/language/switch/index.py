@@ -0,0 +1,172 @@
+##############################################################################
+#
+# Copyright (c) 2005 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Per language catalog index for I18n objects.
+
+$Id$
+"""
+__docformat__ = 'restructuredtext'
+
+import BTrees
+import persistent
+import zope.interface
+import zope.catalog.interfaces
+import zope.container.contained
+import zope.index.field
+import zope.index.interfaces
+from BTrees.OOBTree import OOBTree
+
+from z3c.language.switch import IReadI18n
+from z3c.language.switch.app import getRequest
+from z3c.language.switch.app import negotiateLanguage
+
+# query the negotiated language
+NEGOTIATED = 'negotiated'
+
+
+class II18nFieldIndex(zope.catalog.interfaces.ICatalogIndex,
+                      zope.index.interfaces.IStatistics):
+    """Catalog index storing a field index per language."""
+
+    field_name = zope.interface.Attribute(
+        "Name of the translation attribute to index.")
+
+    interface = zope.interface.Attribute(
+        "Interface to adapt the objects to, IReadI18n if None.")
+
+    def index_language(docid, value, language):
+        """Update the given language of the document only."""
+
+    def getLanguages():
+        """Return the indexed languages."""
+
+    def sort(docids, reverse=False, limit=None, language=NEGOTIATED):
+        """Sort the docids by the value of the given language."""
+
+
+class I18nFieldIndex(persistent.Persistent,
+                     zope.container.contained.Contained):
+    """Field index per language code.
+
+    The values get read using ``IReadI18n.queryAttribute``. A query names the
+    language, or ``NEGOTIATED`` for the negotiated language, and the
+    ``(min, max)`` range of values. The objects never get loaded for
+    searching and sorting.
+    """
+
+    zope.interface.implements(II18nFieldIndex)
+
+    family = BTrees.family32
+
+    def __init__(self, field_name=None, interface=None, family=None):
+        if family is not None:
+            self.family = family
+        self.field_name = field_name
+        self.interface = interface
+        self.clear()
+
+    def clear(self):
+        """See interface IInjection"""
+        self._indexes = OOBTree()
+
+    def documentCount(self):
+        """See interface IStatistics"""
+        docids = self.family.IF.multiunion(
+            [index._rev_index.keys() for index in self._indexes.values()])
+        return len(docids)
+
+    def wordCount(self):
+        """See interface IStatistics"""
+        return sum([index.wordCount() for index in self._indexes.values()])
+
+    def getLanguages(self):
+        """See interface II18nFieldIndex"""
+        return tuple(self._indexes.keys())
+
+    # private helper methods
+    def _getI18n(self, value):
+        if self.interface is None:
+            return IReadI18n(value, None)
+        return self.interface(value, None)
+
+    def _getIndex(self, language):
+        index = self._indexes.get(language)
+        if index is None:
+            index = self._indexes[language] = zope.index.field.FieldIndex(
+                self.family)
+        return index
+
+    def _getLanguage(self, language):
+        if language == NEGOTIATED:
+            request = getRequest()
+            if request is not None:
+                return negotiateLanguage(self.getLanguages(), request, self)
+            return None
+        return language
+
+    def _index(self, docid, i18n, language):
+        value = i18n.queryAttribute(self.field_name, language)
+        if value is None:
+            index = self._indexes.get(language)
+            if index is not None:
+                index.unindex_doc(docid)
+        else:
+            self._getIndex(language).index_doc(docid, value)
+
+    def index_doc(self, docid, value):
+        """See interface IInjection"""
+        i18n = self._getI18n(value)
+        if i18n is None:
+            self.unindex_doc(docid)
+            return
+        languages = i18n.getAvailableLanguages()
+        for language in languages:
+            self._index(docid, i18n, language)
+        for language, index in self._indexes.items():
+            if language not in languages:
+                index.unindex_doc(docid)
+
+    def index_language(self, docid, value, language):
+        """See interface II18nFieldIndex"""
+        i18n = self._getI18n(value)
+        if i18n is None:
+            self.unindex_doc(docid)
+        elif language not in i18n.getAvailableLanguages():
+            index = self._indexes.get(language)
+            if index is not None:
+                index.unindex_doc(docid)
+        else:
+            self._index(docid, i18n, language)
+
+    def unindex_doc(self, docid):
+        """See interface IInjection"""
+        for index in self._indexes.values():
+            index.unindex_doc(docid)
+
+    def apply(self, query):
+        """See interface IIndexSearch
+
+        The query is a dict with the ``language`` and the ``query`` range.
+        """
+        language = self._getLanguage(query.get('language', NEGOTIATED))
+        index = self._indexes.get(language)
+        if index is None:
+            return self.family.IF.Set()
+        return index.apply(query['query'])
+
+    def sort(self, docids, reverse=False, limit=None, language=NEGOTIATED):
+        """See interface II18nFieldIndex"""
+        index = self._indexes.get(self._getLanguage(language))
+        if index is None:
+            return iter(())
+        return index.sort(docids, reverse=reverse, limit=limit)
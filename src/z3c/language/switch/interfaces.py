@@ -18,8 +18,13 @@ $Id$
 __docformat__ = 'restructuredtext'
 
 import zope.interface
+from zope.lifecycleevent.interfaces import IAttributes
+from zope.lifecycleevent.interfaces import IObjectModifiedEvent
 from zope.schema.interfaces import IVocabularyTokenized
 
+# marks a left out argument, None is a valid default value
+_marker = object()
+
 
 class IReadI18n(zope.interface.Interface):
     """Let the language switch to the desired language.
@@ -34,7 +39,22 @@ class IReadI18n(zope.interface.Interface):
         """Return the best matching language."""
 
     def getAvailableLanguages():
-        """Find all the languages that are available."""
+        """Find all the languages that are available.
+
+        Return Value:
+
+        sequence -- Sorted, immutable sequence of language codes.
+
+        """
+
+    def getLanguagesFingerprint():
+        """Return a value which changes if the available languages change.
+
+        The value is cheap to compute and only comparable with values of the
+        same object. Caches keyed on the available languages of an object can
+        use it for validate their entries.
+
+        """
 
     def getAttribute(name, language=None):
         """Get name attribute of the language specific translation.
@@ -56,6 +76,35 @@ class IReadI18n(zope.interface.Interface):
 
         """
 
+    def getAttributes(names, language=None, default=_marker):
+        """Get the named attributes of the language specific translation.
+
+        The language and the translation get looked up only once.
+
+        Parameter:
+
+        names -- Sequence of attribute names.
+
+        language -- Language code for example 'de'. If None the default language
+        is used.
+
+        default -- Any object, None included. If given, it gets returned for
+        missing attributes and for all attributes if the language does not
+        exist. If left out, missing attributes and languages raise.
+
+        Return Value:
+
+        dict -- Attribute values by name.
+
+        Exceptions:
+
+        KeyError -- If no default is given and the language does not exist.
+
+        AttributeError -- If no default is given and an attribute does not
+        exist.
+
+        """
+
     def queryAttribute(name, language=None, default=None):
         """Get name attribute of the language specific translation or default.
 
@@ -137,3 +186,35 @@ class IAvailableLanguages(zope.interface.Interface):
 class IAvailableLanguagesVocabulary(IVocabularyTokenized):
     """Available languages."""
 
+
+
+class ILanguageAttributes(IAttributes):
+    """Describes the modified attributes of a translation."""
+
+    language = zope.interface.Attribute("The involved language code.")
+
+    change = zope.interface.Attribute(
+        "'added' or 'removed' if the language got added or removed, "
+        "None if only attributes changed.")
+
+
+class II18nModifiedEvent(IObjectModifiedEvent):
+    """The translations of an I18n object have been modified.
+
+    The descriptions contain one ``ILanguageAttributes`` per changed
+    language.
+    """
+
+    language = zope.interface.Attribute(
+        "The changed language code or None if several languages changed.")
+
+    names = zope.interface.Attribute(
+        "Sequence of the changed attribute names of the language.")
+
+
+class II18nLanguageAddedEvent(II18nModifiedEvent):
+    """A language has been added to an I18n object."""
+
+
+class II18nLanguageRemovedEvent(II18nModifiedEvent):
+    """A language has been removed from an I18n object."""
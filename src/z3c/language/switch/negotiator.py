@@ -0,0 +1,124 @@
+##############################################################################
+#
+# Copyright (c) 2005 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Cached negotiator lookup.
+
+$Id$
+"""
+__docformat__ = 'restructuredtext'
+
+import threading
+import weakref
+import zope.component
+from zope.i18n.interfaces import INegotiator
+
+try:
+    from zope.interface.interfaces import IRegistrationEvent
+except ImportError:
+    from zope.component.interfaces import IRegistrationEvent
+
+
+def _getRegistryState(sm):
+    """Return the state of the utility registry of the site manager.
+
+    The generation changes if the registry or one of its bases changes in
+    this process. The serial changes if the persistent registry of a local
+    site got changed by another database client and was reloaded.
+    """
+    utilities = getattr(sm, 'utilities', None)
+    if utilities is None:
+        return None
+    # read the generation first, it loads the registry if it is a ghost
+    generation = getattr(utilities, '_generation', None)
+    return generation, getattr(utilities, '_p_serial', None)
+
+
+class NegotiatorResolver(object):
+    """Caches the negotiator per site manager and thread.
+
+    The negotiator gets looked up in the site manager of the given object or
+    of the current site. A cached negotiator gets used as long as the
+    utility registry of the site manager did not change. All caches get
+    invalidated if a component gets registered or unregistered. The counters
+    are not locked and may be approximate.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _getCache(self):
+        local = self._local
+        if getattr(local, 'generation', None) != self._generation:
+            local.cache = weakref.WeakKeyDictionary()
+            local.generation = self._generation
+        return local.cache
+
+    def queryNegotiator(self, context=None):
+        """Return the negotiator of the site of the context or None."""
+        try:
+            sm = zope.component.getSiteManager(context)
+        except zope.component.ComponentLookupError:
+            # can happens during tests without a site and sitemanager
+            return None
+        cache = self._getCache()
+        state = _getRegistryState(sm)
+        entry = cache.get(sm)
+        if entry is not None and entry[0] == state:
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        negotiator = sm.queryUtility(INegotiator, name='')
+        cache[sm] = (state, negotiator)
+        return negotiator
+
+    def invalidate(self):
+        """Drop the cached negotiators of all threads."""
+        self._generation += 1
+        self.invalidations += 1
+
+    def getStatistics(self):
+        """Return the counters as dict, e.g. for a metrics endpoint."""
+        lookups = self.hits + self.misses
+        ratio = 0.0
+        if lookups:
+            ratio = float(self.hits) / lookups
+        return {'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+                'ratio': ratio}
+
+    def resetStatistics(self):
+        self.hits = self.misses = self.invalidations = 0
+
+
+resolver = NegotiatorResolver()
+queryNegotiator = resolver.queryNegotiator
+getStatistics = resolver.getStatistics
+
+
+@zope.component.adapter(IRegistrationEvent)
+def invalidateNegotiators(event):
+    """Invalidate the cached negotiators if the registrations change."""
+    resolver.invalidate()
+
+
+try:
+    from zope.testing.cleanup import addCleanUp
+except ImportError:
+    pass
+else:
+    addCleanUp(resolver.invalidate)
@@ -17,7 +17,45 @@ $Id$
 """
 __docformat__ = 'restructuredtext'
 
+import zope.schema
+
+from z3c.language.switch import cache
+
 _marker = object()
+_fieldBind = zope.schema.Field.bind.im_func
+
+
+def _needsBind(field):
+    """Return True if default or validation depend on the bound context."""
+    if getattr(field, 'defaultFactory', None) is not None:
+        return True
+    bind = getattr(type(field), 'bind', None)
+    return getattr(bind, 'im_func', bind) is not _fieldBind
+
+
+def getI18nFieldValues(inst, schema, language=None):
+    """Return the values of all schema fields as dict.
+
+    Works like reading each field using an I18nFieldProperty, but the
+    language gets negotiated and the translation looked up only once.
+    Missing values are replaced by the field default.
+    """
+    if language is None:
+        language = inst.getPreferedLanguage()
+
+    names = zope.schema.getFieldNames(schema)
+    values = inst.getAttributes(names, language, _marker)
+    for name in names:
+        if values[name] is _marker:
+            field = schema[name]
+            if _needsBind(field):
+                field = field.bind(inst)
+            value = getattr(field, 'default', _marker)
+            if value is _marker:
+                raise AttributeError, name
+            values[name] = value
+
+    return values
 
 
 class I18nFieldProperty(object):
@@ -29,6 +67,10 @@ class I18nFieldProperty(object):
     Note that I18nFieldProperties can only be used for attributes stored in
     a translation object. The class using this I18nFieldProperty must implement
     z3c.langauge.switch.II18n.
+
+    The default and the validation of fields which do not depend on the
+    context get computed without binding the field. The values get read
+    using the value cache if it is enabled, see cache.enableValueCache.
     """
 
     def __init__(self, field, name=None):
@@ -37,22 +79,36 @@ class I18nFieldProperty(object):
 
         self.__field = field
         self.__name = name
+        self.__bind = _needsBind(field)
+        self.__default = getattr(field, 'default', _marker)
 
     def __get__(self, inst, klass):
         if inst is None:
             return self
 
-        value = inst.queryAttribute(self.__name, inst.getPreferedLanguage(), _marker)
+        language = inst.getPreferedLanguage()
+        valueCache = cache.valueCache
+        if valueCache is None:
+            value = inst.queryAttribute(self.__name, language, _marker)
+        else:
+            value = valueCache.queryAttribute(inst, self.__name, language,
+                                              _marker)
         if value is _marker:
-            field = self.__field.bind(inst)
-            value = getattr(field, 'default', _marker)
+            if self.__bind:
+                field = self.__field.bind(inst)
+                value = getattr(field, 'default', _marker)
+            else:
+                value = self.__default
             if value is _marker:
                 raise AttributeError, self.__name
 
         return value
 
     def __set__(self, inst, value):
-        field = self.__field.bind(inst)
+        if self.__bind:
+            field = self.__field.bind(inst)
+        else:
+            field = self.__field
         field.validate(value)
         # make kws dict
         kws = {}
@@ -82,6 +138,8 @@ class I18nLanguageSwitchFieldProperty(object):
 
         self.__field = field
         self.__name = name
+        self.__bind = _needsBind(field)
+        self.__default = getattr(field, 'default', _marker)
 
     def __get__(self, inst, klass):
         # essentails
@@ -90,10 +148,17 @@ class I18nLanguageSwitchFieldProperty(object):
         i18n = inst.i18n
         lang = inst.getLanguage()
 
-        value = i18n.queryAttribute(self.__name, lang, _marker)
+        valueCache = cache.valueCache
+        if valueCache is None:
+            value = i18n.queryAttribute(self.__name, lang, _marker)
+        else:
+            value = valueCache.queryAttribute(i18n, self.__name, lang, _marker)
         if value is _marker:
-            field = self.__field.bind(inst)
-            value = getattr(field, 'default', _marker)
+            if self.__bind:
+                field = self.__field.bind(inst)
+                value = getattr(field, 'default', _marker)
+            else:
+                value = self.__default
             if value is _marker:
                 raise AttributeError, self.__name
 
@@ -104,7 +169,10 @@ class I18nLanguageSwitchFieldProperty(object):
         i18n = inst.i18n
         lang = inst.getLanguage()
 
-        field = self.__field.bind(inst)
+        if self.__bind:
+            field = self.__field.bind(inst)
+        else:
+            field = self.__field
         field.validate(value)
         # make kws dict
         kws = {}
@@ -19,19 +19,26 @@ __docformat__ = 'restructuredtext'
 
 import zope.interface
 import zope.component.testing
+import zope.schema
 from zope.interface.verify import verifyClass
 
 from z3c.language.switch import IReadI18n
 from z3c.language.switch import IWriteI18n
 from z3c.language.switch import II18n
 from z3c.language.switch import II18nLanguageSwitch
+from z3c.language.switch.app import BTreeI18n
+from z3c.language.switch.app import I18n
+from z3c.language.switch.app import Translation
+from z3c.language.switch.app import compactTranslationFactory
+from z3c.language.switch.property import I18nFieldProperty
 from z3c.testing import InterfaceBaseTest
 from z3c.testing import marker_pos
 from z3c.testing import marker_kws
 
-def sorted(list):
-    list.sort()
-    return list
+def sorted(seq):
+    seq = list(seq)
+    seq.sort()
+    return seq
 
 
 ################################################################################
@@ -166,6 +173,51 @@ class I18nContentObject(object):
         return language
 
 
+class Document(Translation):
+    """Persistent translation."""
+
+    def __init__(self, title=u''):
+        self.title = title
+
+
+class BTreeI18nDocument(BTreeI18n):
+    """I18n document storing each translation in its own record."""
+
+    _defaultLanguage = 'en'
+    _factory = Document
+
+
+class IDocument(zope.interface.Interface):
+    """Document schema."""
+
+    title = zope.schema.TextLine(title=u'Title', default=u'')
+
+
+CompactDocument = compactTranslationFactory(IDocument, 'CompactDocument')
+
+
+class CompactI18nDocument(I18n):
+    """I18n document using compact translations."""
+
+    zope.interface.implements(IDocument)
+
+    _defaultLanguage = 'en'
+    _factory = CompactDocument
+
+    title = I18nFieldProperty(IDocument['title'])
+
+
+class LazyI18nDocument(I18n):
+    """I18n document keeping persistent translations in its own mapping."""
+
+    zope.interface.implements(IDocument)
+
+    _defaultLanguage = 'en'
+    _factory = Document
+
+    title = I18nFieldProperty(IDocument['title'])
+
+
 class I18nContentObjectLanguageSwitch(object):
     """Language switch for I18nContentObject."""
     
@@ -224,6 +276,16 @@ class BaseTestII18n(InterfaceBaseTest):
         i18n = self.makeI18nTestObject()
         self.assertEqual(i18n.getDefaultLanguage(), 'de')
 
+    def test_getLanguagesFingerprint(self):
+        i18n = self.makeI18nTestObject()
+        fingerprint = i18n.getLanguagesFingerprint()
+        self.assertEqual(i18n.getLanguagesFingerprint(), fingerprint)
+        i18n.addLanguage('fr')
+        added = i18n.getLanguagesFingerprint()
+        self.assertNotEqual(added, fingerprint)
+        i18n.removeLanguage('fr')
+        self.assertNotEqual(i18n.getLanguagesFingerprint(), added)
+
     # IWriteI18n tests
     def test_setDefaultLanguage(self):
         i18n = self.makeI18nTestObject()
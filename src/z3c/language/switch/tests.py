@@ -20,11 +20,103 @@ __docformat__ = 'restructuredtext'
 import doctest
 import unittest
 
+from z3c.language.switch import benchmark
+
+
+class AvailableLanguagesTest(unittest.TestCase):
+    """The cached language lookups with 30 translations.
+
+    The speed gets compared with the uncached lookups by the benchmark.
+    """
+
+    def setUp(self):
+        self.doc = benchmark.makeDocument(30)
+
+    def test_getAvailableLanguages(self):
+        languages = self.doc.getAvailableLanguages()
+        self.assertTrue(isinstance(languages, tuple))
+        self.assertEqual(list(languages), sorted(self.doc._getData().keys()))
+        self.assertTrue(languages is self.doc.getAvailableLanguages())
+
+    def test_getAttribute(self):
+        self.assertEqual(self.doc.getAttribute('title', 'l015'), u'Title 15')
+        self.assertRaises(KeyError, self.doc.getAttribute, 'title', 'xx')
+
+    def test_rebuild(self):
+        self.doc.addLanguage('aa', title=u'aa')
+        self.assertEqual(self.doc.getAvailableLanguages()[0], 'aa')
+        self.doc.removeLanguage('aa')
+        self.assertFalse('aa' in self.doc.getAvailableLanguages())
+
+
+class BenchmarkTest(unittest.TestCase):
+
+    def test_run(self):
+        results = benchmark.run(languages=(1, 3), number=10, repeat=1)
+        self.assertEqual(len(results), 2 * len(benchmark.BENCHMARKS))
+        for result in results:
+            self.assertTrue(result['ops_per_sec'] > 0)
+            self.assertTrue(result['allocations'] >= 0)
+        self.assertEqual(sorted(results[0].keys()),
+            ['allocations', 'allocations_method', 'languages', 'name',
+             'ops_per_sec'])
+
+    def test_coldCache(self):
+        dict, lazy = benchmark.runColdCache(objects=20, languages=5)
+        self.assertEqual(dict['name'], 'cold cache dict')
+        self.assertEqual(lazy['name'], 'cold cache lazy')
+        self.assertEqual(lazy['objects'], 20)
+        # the lazy layout activates the object, its BTree and one
+        # translation per object but never the other translations
+        self.assertTrue(lazy['loaded_objects'] < 20 * 5)
+
+    def test_memoryUsage(self):
+        dict, compact = benchmark.runMemoryUsage(objects=10, languages=5)
+        self.assertEqual(dict['name'], 'memory dict')
+        self.assertEqual(compact['name'], 'memory compact')
+        self.assertTrue(compact['bytes'] < dict['bytes'])
+
+    def test_maintenance(self):
+        loop, pool = benchmark.runMaintenance(objects=20, languages=2)
+        self.assertEqual(loop['name'], 'maintenance loop')
+        self.assertEqual(pool['name'], 'maintenance pool')
+        self.assertEqual((loop['changed'], pool['changed']), (20, 20))
+        self.assertEqual(pool['processes'], 1)
+
+    def test_main(self):
+        import os, tempfile
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            benchmark.main(['-n', '10', '-r', '1', '-l', '2',
+                            '-b', 'getAttribute', '-m', '2', '-o', path])
+            data = benchmark.json.load(open(path))
+        finally:
+            os.remove(path)
+        self.assertEqual([(r['name'], r['languages'])
+                          for r in data['results']], [('getAttribute', 2)])
+        self.assertEqual([r['name'] for r in data['memory']],
+                         ['memory dict', 'memory compact'])
+
 
 def test_suite():
     return unittest.TestSuite((
-        doctest.DocFileSuite('README.txt'),
-        doctest.DocFileSuite('app.py')
+        doctest.DocFileSuite('README.txt',
+            optionflags=doctest.NORMALIZE_WHITESPACE|doctest.ELLIPSIS),
+        doctest.DocFileSuite('app.py', optionflags=doctest.ELLIPSIS),
+        doctest.DocFileSuite('index.txt'),
+        doctest.DocFileSuite('exchange.txt'),
+        doctest.DocFileSuite('bulk.txt', optionflags=doctest.ELLIPSIS),
+        doctest.DocTestSuite('z3c.language.switch.bulk'),
+        doctest.DocTestSuite('z3c.language.switch.cache'),
+        doctest.DocTestSuite('z3c.language.switch.context'),
+        doctest.DocFileSuite('browser/README.txt',
+                             optionflags=doctest.NORMALIZE_WHITESPACE),
+        doctest.DocTestSuite('z3c.language.switch.browser.views'),
+        doctest.DocTestSuite('z3c.language.switch.generations.evolve1',
+                             optionflags=doctest.ELLIPSIS),
+        unittest.makeSuite(AvailableLanguagesTest),
+        unittest.makeSuite(BenchmarkTest),
         ))
 
 if __name__=='__main__':
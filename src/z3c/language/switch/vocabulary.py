@@ -24,6 +24,28 @@ from zope.schema.vocabulary import SimpleTerm
 from zope.schema.vocabulary import SimpleVocabulary
 
 from z3c.language.switch import IAvailableLanguagesVocabulary
+from z3c.language.switch.cache import LRUCache
+
+# shared terms by language code
+_terms = {}
+
+
+def getLanguageTerm(language):
+    """Return the shared term of a language code."""
+    term = _terms.get(language)
+    if term is None:
+        term = _terms.setdefault(language,
+                                 SimpleTerm(language, language, language))
+    return term
+
+
+def _getLanguages(context):
+    # returns available languages form the object itself
+    # but just after creation of the object
+    try:
+        return tuple(context.getAvailableLanguages())
+    except AttributeError:
+        return ()
 
 
 class AvailableLanguagesVocabulary(SimpleVocabulary):
@@ -33,18 +55,33 @@ class AvailableLanguagesVocabulary(SimpleVocabulary):
 
     zope.interface.classProvides(IVocabularyFactory)
 
-    def __init__(self, context):
-        terms = []
-        
-        # returns available languages form the object itself
-        # but just after creation of the object
-        try:
-            languages = context.getAvailableLanguages()
-        except AttributeError:
-            languages = []
+    def __init__(self, context, languages=None):
+        if languages is None:
+            languages = _getLanguages(context)
+        terms = [getLanguageTerm(lang) for lang in languages]
+        terms.sort(key=lambda term: term.title)
+        super(AvailableLanguagesVocabulary, self).__init__(terms)
 
-        for lang in languages:
-            terms.append(SimpleTerm(lang, lang, lang))
 
-        terms.sort(lambda lhs, rhs: cmp(lhs.title, rhs.title))
-        super(AvailableLanguagesVocabulary, self).__init__(terms)
+class AvailableLanguagesVocabularyFactory(object):
+    """Returns shared vocabularies by the set of available languages.
+
+    The vocabularies are kept in a bounded LRU cache and must not get
+    modified.
+    """
+
+    zope.interface.implements(IVocabularyFactory)
+
+    def __init__(self, maxsize=256):
+        self.vocabularies = LRUCache(maxsize)
+
+    def __call__(self, context):
+        languages = _getLanguages(context)
+        vocabulary = self.vocabularies.get(languages)
+        if vocabulary is None:
+            vocabulary = AvailableLanguagesVocabulary(context, languages)
+            self.vocabularies.set(languages, vocabulary)
+        return vocabulary
+
+
+availableLanguagesVocabularyFactory = AvailableLanguagesVocabularyFactory()